@@ -1,25 +1,64 @@
+import logging
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 
 from core.config import settings
 from core.database import init_db, get_db
-from models.article import SearchRequest, SearchResponse, SearchDB, ArticleDB, SearchSchema, ArticleSchema
+from core.logging_config import configure_logging
+from core.metrics import API_REQUEST_SECONDS, CONTENT_TYPE, EXPORT_SECONDS, REGISTRY, SEARCHES_IN_FLIGHT
+from models.article import (
+    SearchRequest, SearchResponse, SearchDB, ArticleDB, SearchSchema, ArticleSchema, SearchJobStatus,
+    SearchDetailSchema, SearchHistoryPage, CitationHistoryDB, CitationPoint, CitationRefreshResult,
+    ShardedSearchRequest, BatchSearchRequest, BatchStatus, CrawlJobDB
+)
 from services.original_spider import OriginalScholarSpider
 from services.export import ExportService
+from services import batch_search, search_jobs
+from services.search_jobs import SearchJob
+from services.browser_pool import shutdown_browser_pool
+from services.citation_refresh import refresh_search, start_refresh_scheduler
+from services.crawl_resume import start_resume_scheduler
+from services.egress_pool import get_egress_pool
+from services.fingerprint import unique_articles
+from services.job_queue import (
+    enqueue_batch, enqueue_job, get_batch_status as get_queued_batch_status, get_job_status as get_queued_job_status,
+    wait_for_job
+)
+from services.parse_executor import shutdown_parse_executor
+from services.persistence import (
+    article_page, begin_checkpoint, bulk_insert_articles, checkpoint_heartbeat, count_search_articles,
+    delete_search_articles, find_recent_search, finish_checkpoint, linked_articles, mark_search_failed,
+    ranked_articles, save_checkpoint, search_history_page
+)
+from services.sharded_search import run_sharded_job
+from services.search_stream import STREAM_MEDIA_TYPES, stream_search
+from services.streaming_export import STREAMING_FORMATS, stream_export
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    # With the crawl queue, crawling (including scheduled refreshes) is left to worker.py processes
+    refresh_task = None if settings.crawl_queue_enabled else start_refresh_scheduler()
+    resume_task = start_resume_scheduler()
     yield
     # Shutdown
+    for task in (refresh_task, resume_task):
+        if task:
+            task.cancel()
+    shutdown_parse_executor()
+    shutdown_browser_pool()
 
 
 app = FastAPI(
@@ -38,76 +77,349 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not raw path, so /api/search/{search_id} stays one series
+    route = request.scope.get("route")
+    API_REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method, route=route.path if route else "unmatched", status=response.status_code
+    )
+    return response
+
+
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy", "version": settings.app_version}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of this process's counters, gauges and histograms"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/api/egress")
+async def egress_status():
+    """Health score inputs of each egress identity (latency, block rate, current rate)"""
+    return get_egress_pool().stats()
+
+
+def _sort_articles(articles: List[ArticleSchema], sort_by: str) -> List[ArticleSchema]:
+    if sort_by == "citations":
+        return sorted(articles, key=lambda x: x.citations, reverse=True)
+    elif sort_by == "citations_per_year":
+        return sorted(articles, key=lambda x: x.citations_per_year, reverse=True)
+    elif sort_by == "year":
+        return sorted(articles, key=lambda x: x.year or 0, reverse=True)
+    return list(articles)
+
+
+async def _search_via_queue(db: AsyncSession, search_record: SearchDB, request: SearchRequest) -> SearchResponse:
+    """Queue mode: let a crawl worker run the search and answer from what it stored"""
+    enqueue_job(db, search_record.id, request)
+    await db.commit()
+    status = await wait_for_job(search_record.id, settings.crawl_queue_sync_timeout)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Search not found")
+    if status.status == "failed":
+        raise HTTPException(status_code=500, detail=status.error or "Search failed")
+    
+    result = await db.execute(ranked_articles(search_record.id))
+    articles = [ArticleSchema.model_validate(article) for article in result.scalars()]
+    completed = status.status == "completed"
+    return SearchResponse(
+        search_id=search_record.id,
+        keyword=request.keyword,
+        total_results=len(articles),
+        articles=_sort_articles(articles, request.sort_by),
+        insert_ms=status.insert_ms if completed else None,
+        page_outcomes=status.page_outcomes if completed else [],
+        message="Search completed successfully" if completed else
+        f"Search is still running in the crawl queue; poll /api/search/jobs/{search_record.id}"
+    )
+
+
 @app.post("/api/search", response_model=SearchResponse)
 async def search_articles(
     request: SearchRequest,
     background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
+    started = time.perf_counter()
+    cached_search = await find_recent_search(db, request)
+    if cached_search:
+        # Take the top num_results in Scholar's relevance order, then apply this request's sort
+        result = await db.execute(ranked_articles(cached_search.id).limit(request.num_results))
+        articles = [ArticleSchema.model_validate(article) for article in result.scalars()]
+        logger.info("Served '%s' from search %d in %.1fms", request.keyword, cached_search.id,
+                    (time.perf_counter() - started) * 1000)
+        return SearchResponse(
+            search_id=cached_search.id,
+            keyword=request.keyword,
+            total_results=len(articles),
+            articles=_sort_articles(articles, request.sort_by),
+            message="Search served from recent results"
+        )
+    
     search_record = SearchDB(
         keyword=request.keyword,
         start_year=request.start_year,
         end_year=request.end_year
     )
+    begin_checkpoint(search_record, request)
     db.add(search_record)
     await db.commit()
     await db.refresh(search_record)
     
+    if settings.crawl_queue_enabled:
+        return await _search_via_queue(db, search_record, request)
+    
     try:
-        async with OriginalScholarSpider() as spider:
-            articles = await spider.search(
-                keyword=request.keyword,
-                num_results=request.num_results,
-                start_year=request.start_year,
-                end_year=request.end_year
-            )
+        articles = []
+        insert_ms = 0.0
+        with SEARCHES_IN_FLIGHT.track_inprogress(mode="sync"):
+            async with OriginalScholarSpider() as spider, checkpoint_heartbeat(search_record.id):
+                pages = spider.iter_search(
+                    keyword=request.keyword,
+                    num_results=request.num_results,
+                    start_year=request.start_year,
+                    end_year=request.end_year,
+                    use_cache=request.use_cache
+                )
+                try:
+                    async for start, page_articles in pages:
+                        # Store each page in Scholar's relevance order as it arrives, with a checkpoint,
+                        # so a restart mid-crawl resumes from the next page instead of starting over
+                        insert_ms += await bulk_insert_articles(
+                            db, search_record.id, enumerate(page_articles, start=len(articles) + 1)
+                        )
+                        articles.extend(page_articles)
+                        save_checkpoint(
+                            search_record, start, len(articles), await count_search_articles(db, search_record.id)
+                        )
+                        await db.commit()
+                finally:
+                    await pages.aclose()
         
         # Return empty results if nothing found
         if not articles:
-            print(f"No results found for '{request.keyword}' - may be blocked by Google Scholar")
-        
-        if request.sort_by == "citations":
-            articles.sort(key=lambda x: x.citations, reverse=True)
-        elif request.sort_by == "citations_per_year":
-            articles.sort(key=lambda x: x.citations_per_year, reverse=True)
-        elif request.sort_by == "year":
-            articles.sort(key=lambda x: x.year or 0, reverse=True)
+            logger.warning("No results found for '%s' - may be blocked by Google Scholar", request.keyword)
         
-        for article in articles:
-            article_db = ArticleDB(
-                title=article.title,
-                authors=article.authors,
-                venue=article.venue,
-                publisher=article.publisher,
-                year=article.year,
-                citations=article.citations,
-                citations_per_year=article.citations_per_year,
-                description=article.description,
-                url=article.url,
-                search_id=search_record.id
-            )
-            db.add(article_db)
-        
-        search_record.total_results = len(articles)
+        search_record.page_outcomes = spider.page_outcome_list()
+        finish_checkpoint(search_record)
         await db.commit()
+        logger.info("Stored %d articles for search %d in %.1fms", len(articles), search_record.id, insert_ms)
         
+        # Scholar can list a paper twice; the search links it once
+        articles = unique_articles(articles)
         return SearchResponse(
             search_id=search_record.id,
             keyword=request.keyword,
             total_results=len(articles),
-            articles=articles
+            articles=_sort_articles(articles, request.sort_by),
+            rate_limit_wait=round(spider.rate_limit_wait, 3),
+            insert_ms=round(insert_ms, 2),
+            page_outcomes=search_record.page_outcomes
         )
         
+    except Exception as e:
+        await db.rollback()
+        await mark_search_failed(db, search_record.id)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/search/stream")
+async def stream_search_articles(
+    request: SearchRequest,
+    format: str = "ndjson",
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream each article as its page is parsed, as NDJSON lines or Server-Sent Events"""
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid stream format")
+    
+    cached_search = await find_recent_search(db, request)
+    return StreamingResponse(
+        stream_search(request, format, cached_search.id if cached_search else None),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/search/jobs", response_model=SearchJobStatus, status_code=202)
+async def start_search_job(
+    request: SearchRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
+    """Start a crawl in the background and return its search_id immediately"""
+    cached_search = await find_recent_search(db, request)
+    if cached_search:
+        return SearchJobStatus(
+            search_id=cached_search.id,
+            keyword=cached_search.keyword,
+            status="completed",
+            articles_parsed=cached_search.total_results,
+            eta_seconds=0.0
+        )
+    
+    search_record = SearchDB(
+        keyword=request.keyword,
+        start_year=request.start_year,
+        end_year=request.end_year
+    )
+    # Checkpointed from the start, so a restart before the job runs still resumes it
+    begin_checkpoint(search_record, request)
+    db.add(search_record)
+    await db.commit()
+    await db.refresh(search_record)
+    
+    if settings.crawl_queue_enabled:
+        enqueue_job(db, search_record.id, request)
+        await db.commit()
+        return SearchJob(search_id=search_record.id, request=request).to_status()
+    
+    job = search_jobs.create_job(search_record.id, request)
+    background_tasks.add_task(search_jobs.run_search_job, job)
+    return job.to_status()
+
+
+@app.post("/api/search/sharded", response_model=SearchJobStatus, status_code=202)
+async def start_sharded_search(
+    request: ShardedSearchRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
+    """Crawl past Scholar's per-query ceiling by splitting the keyword into year windows; poll like a job"""
+    search_record = SearchDB(
+        keyword=request.keyword,
+        start_year=request.start_year,
+        end_year=request.end_year,
+        mode="sharded"
+    )
+    begin_checkpoint(search_record, request)
+    db.add(search_record)
+    await db.commit()
+    await db.refresh(search_record)
+    
+    if settings.crawl_queue_enabled:
+        enqueue_job(db, search_record.id, request, kind="sharded")
+        await db.commit()
+        return SearchJob(search_id=search_record.id, request=request).to_status()
+    
+    job = search_jobs.create_job(search_record.id, request)
+    background_tasks.add_task(run_sharded_job, job)
+    return job.to_status()
+
+
+@app.post("/api/search/batch", response_model=BatchStatus, status_code=202)
+async def start_batch_search(
+    request: BatchSearchRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
+    """Crawl many keywords through one shared page queue; one search per keyword, polled as a batch"""
+    batch = await batch_search.create_batch(db, request)
+    if settings.crawl_queue_enabled:
+        enqueue_batch(db, batch)
+        await db.commit()
+        return batch.to_status()
+    
+    batch_search.register_batch(batch)
+    background_tasks.add_task(batch_search.run_batch, batch)
+    return batch.to_status()
+
+
+@app.get("/api/search/batch/{batch_id}", response_model=BatchStatus)
+async def get_batch_search(
+    batch_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    batch = batch_search.get_batch(batch_id)
+    if batch:
+        return batch.to_status()
+    
+    # Queued batches are tracked in the crawl queue, which every API process can read
+    status = await get_queued_batch_status(db, batch_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return status
+
+
+@app.get("/api/search/jobs/{search_id}", response_model=SearchJobStatus)
+async def get_search_job(
+    search_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    job = search_jobs.get_job(search_id)
+    if job:
+        return job.to_status()
+    
+    # Progress reported by the crawl worker that owns it
+    status = await get_queued_job_status(db, search_id)
+    if status:
+        return status
+    
+    # Not tracked by this process (finished long ago, crawled synchronously or by another worker)
+    search = await db.get(SearchDB, search_id)
+    if not search:
+        raise HTTPException(status_code=404, detail="Search not found")
+    # Searches stored before checkpoints have no status and are complete
+    status = search.status or "completed"
+    return SearchJobStatus(
+        search_id=search.id,
+        keyword=search.keyword,
+        status=status,
+        pages_done=(search.checkpoint or {}).get("pages_done", 0),
+        articles_parsed=search.total_results or 0,
+        eta_seconds=0.0 if status == "completed" else None,
+        page_outcomes=search.page_outcomes or []
+    )
+
+
+@app.post("/api/search/{search_id}/refresh", response_model=CitationRefreshResult)
+async def refresh_search_citations(
+    search_id: int,
+    force: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """Update citation counts in place, re-fetching only pages with stale articles (all pages with `force`)"""
+    search = await db.get(SearchDB, search_id)
+    if not search:
+        raise HTTPException(status_code=404, detail="Search not found")
+    try:
+        return await refresh_search(db, search, force=force)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/articles/{article_id}/citations", response_model=List[CitationPoint])
+async def get_citation_history(
+    article_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Citation count over time; one point per observed change"""
+    article = await db.get(ArticleDB, article_id)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    result = await db.execute(
+        select(CitationHistoryDB)
+        .where(CitationHistoryDB.article_id == article_id)
+        .order_by(CitationHistoryDB.recorded_at, CitationHistoryDB.id)
+    )
+    history = list(result.scalars())
+    if not history:
+        return [CitationPoint(citations=article.citations or 0,
+                              recorded_at=article.refreshed_at or article.created_at)]
+    return history
+
+
 @app.get("/api/searches", response_model=List[SearchSchema])
 async def get_search_history(
     skip: int = 0,
@@ -125,22 +437,110 @@ async def get_search_history(
     return searches
 
 
-@app.get("/api/search/{search_id}", response_model=SearchSchema)
+@app.get("/api/searches/summary", response_model=SearchHistoryPage)
+async def get_search_history_summary(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    with_counts: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """Search history without articles, newest first, paginated by an opaque cursor"""
+    try:
+        items, next_cursor = await search_history_page(db, limit, cursor, with_counts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SearchHistoryPage(items=items, next_cursor=next_cursor)
+
+
+@app.get("/api/search/{search_id}", response_model=SearchDetailSchema)
 async def get_search_details(
     search_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    sort_by: str = Query("rank", pattern="^(rank|citations|citations_per_year|year)$"),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(SearchDB)
-        .options(selectinload(SearchDB.articles))
-        .where(SearchDB.id == search_id)
-    )
-    search = result.scalar_one_or_none()
+    """Search details; pass `limit` (and then `cursor`) to page through the articles"""
+    if limit is None:
+        result = await db.execute(
+            select(SearchDB)
+            .options(selectinload(SearchDB.articles))
+            .where(SearchDB.id == search_id)
+        )
+        search = result.scalar_one_or_none()
+        
+        if not search:
+            raise HTTPException(status_code=404, detail="Search not found")
+        
+        return search
     
+    search = await db.get(SearchDB, search_id)
     if not search:
         raise HTTPException(status_code=404, detail="Search not found")
     
-    return search
+    try:
+        articles, next_cursor = await article_page(db, search_id, limit, cursor, sort_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return SearchDetailSchema(
+        id=search.id,
+        keyword=search.keyword,
+        start_year=search.start_year,
+        end_year=search.end_year,
+        total_results=search.total_results or 0,
+        created_at=search.created_at,
+        articles=articles,
+        page_outcomes=search.page_outcomes,
+        next_cursor=next_cursor
+    )
+
+
+async def _export_response(db: AsyncSession, search_ids: List[int], format: str):
+    result = await db.execute(select(SearchDB.id, SearchDB.keyword).where(SearchDB.id.in_(search_ids)))
+    keywords = dict(result.all())
+    if not search_ids or len(keywords) != len(set(search_ids)):
+        raise HTTPException(status_code=404, detail="Search not found")
+    
+    stem = keywords[search_ids[0]] if len(search_ids) == 1 else "merged"
+    
+    if format in STREAMING_FORMATS:
+        # Streamed straight from a server-side cursor, never materialized in memory
+        media_type, extension = STREAMING_FORMATS[format]
+        return StreamingResponse(
+            stream_export(search_ids, format),
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f"attachment; filename=scholar_results_{stem}.{extension}"
+            }
+        )
+    elif format == "excel":
+        with EXPORT_SECONDS.time(format="excel"):
+            result = await db.execute(linked_articles(search_ids))
+            # An article found by several of the searches is exported once
+            articles = {}
+            for article in result.scalars():
+                articles.setdefault(article.id, ArticleSchema.model_validate(article))
+            content = ExportService.to_excel(list(articles.values()))
+        return Response(
+            content=content,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={
+                "Content-Disposition": f"attachment; filename=scholar_results_{stem}.xlsx"
+            }
+        )
+    
+    raise HTTPException(status_code=400, detail="Invalid export format")
+
+
+@app.get("/api/export")
+async def export_merged_results(
+    search_ids: List[int] = Query(...),
+    format: str = "csv",
+    db: AsyncSession = Depends(get_db)
+):
+    """Export the articles of several searches as one file"""
+    return await _export_response(db, search_ids, format)
 
 
 @app.get("/api/export/{search_id}")
@@ -149,44 +549,7 @@ async def export_search_results(
     format: str = "csv",
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(SearchDB)
-        .options(selectinload(SearchDB.articles))
-        .where(SearchDB.id == search_id)
-    )
-    search = result.scalar_one_or_none()
-    
-    if not search:
-        raise HTTPException(status_code=404, detail="Search not found")
-    
-    articles = [ArticleSchema.model_validate(article) for article in search.articles]
-    
-    if format == "csv":
-        content = ExportService.to_csv(articles)
-        media_type = "text/csv"
-        filename = f"scholar_results_{search.keyword}.csv"
-    elif format == "json":
-        content = ExportService.to_json(articles)
-        media_type = "application/json"
-        filename = f"scholar_results_{search.keyword}.json"
-    elif format == "excel":
-        content = ExportService.to_excel(articles)
-        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        filename = f"scholar_results_{search.keyword}.xlsx"
-    elif format == "bibtex":
-        content = ExportService.to_bibtex(articles)
-        media_type = "text/plain"
-        filename = f"scholar_results_{search.keyword}.bib"
-    else:
-        raise HTTPException(status_code=400, detail="Invalid export format")
-    
-    return Response(
-        content=content,
-        media_type=media_type,
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
-    )
+    return await _export_response(db, [search_id], format)
 
 
 @app.delete("/api/search/{search_id}")
@@ -194,16 +557,13 @@ async def delete_search(
     search_id: int,
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(SearchDB)
-        .options(selectinload(SearchDB.articles))
-        .where(SearchDB.id == search_id)
-    )
-    search = result.scalar_one_or_none()
+    search = await db.get(SearchDB, search_id)
     
     if not search:
         raise HTTPException(status_code=404, detail="Search not found")
     
+    await db.execute(delete(CrawlJobDB).where(CrawlJobDB.search_id == search_id))
+    await delete_search_articles(db, search_id)
     await db.delete(search)
     await db.commit()
     
@@ -0,0 +1,94 @@
+"""Batch search from the command line.
+
+Runs a keyword list through the same shared crawl scheduler as POST /api/search/batch,
+in-process and against the same database, printing progress until every keyword is
+done. The resulting searches show up in the API and the frontend like any other.
+
+    cd backend && python batch.py "graph neural networks" "link prediction" [--file keywords.txt]
+        [--num-results 100] [--start-year 2018] [--end-year 2024] [--no-cache] [--json]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from pydantic import ValidationError
+
+from core.database import AsyncSessionLocal, engine, init_db
+from core.logging_config import configure_logging
+from models.article import BatchSearchRequest
+from services.batch_search import create_batch, run_batch
+from services.browser_pool import shutdown_browser_pool
+from services.parse_executor import shutdown_parse_executor
+
+
+def read_keywords(args) -> list:
+    keywords = list(args.keywords)
+    if args.file:
+        text = sys.stdin.read() if args.file == "-" else Path(args.file).read_text(encoding="utf-8")
+        keywords.extend(line for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#"))
+    return keywords
+
+
+async def report_progress(batch, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        status = batch.to_status()
+        done = sum(1 for search in status.searches if search.status in ("completed", "failed"))
+        eta = f", eta {status.eta_seconds:.0f}s" if status.eta_seconds is not None else ""
+        print(f"[{status.elapsed_seconds:6.1f}s] {done}/{len(status.searches)} keywords, "
+              f"{status.pages_done}/{status.pages_total} pages, {status.articles_parsed} articles{eta}",
+              file=sys.stderr)
+
+
+async def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("keywords", nargs="*", help="keywords to search")
+    arg_parser.add_argument("--file", help="file with one keyword per line ('-' for stdin, '#' comments)")
+    arg_parser.add_argument("--num-results", type=int, default=50, help="results per keyword")
+    arg_parser.add_argument("--start-year", type=int)
+    arg_parser.add_argument("--end-year", type=int)
+    arg_parser.add_argument("--no-cache", action="store_true", help="bypass the page cache and recent searches")
+    arg_parser.add_argument("--progress", type=float, default=5.0, help="seconds between progress lines (0 for none)")
+    arg_parser.add_argument("--json", action="store_true", help="print the final batch status as JSON")
+    args = arg_parser.parse_args()
+
+    try:
+        request = BatchSearchRequest(
+            keywords=read_keywords(args), num_results=args.num_results,
+            start_year=args.start_year, end_year=args.end_year, use_cache=not args.no_cache
+        )
+    except ValidationError as e:
+        arg_parser.error(str(e))
+
+    configure_logging()
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        batch = await create_batch(db, request)
+
+    progress = asyncio.create_task(report_progress(batch, args.progress)) if args.progress > 0 else None
+    try:
+        await run_batch(batch)
+    finally:
+        if progress:
+            progress.cancel()
+        shutdown_parse_executor()
+        shutdown_browser_pool()
+        await engine.dispose()
+
+    status = batch.to_status()
+    if args.json:
+        print(status.model_dump_json(indent=2))
+    else:
+        print(f"{'search_id':>9}  {'status':<9}  {'articles':>8}  keyword")
+        for search in status.searches:
+            print(f"{search.search_id:>9}  {search.status:<9}  {search.articles_parsed:>8}  {search.keyword}")
+        print(f"{status.articles_parsed} articles from {status.pages_done} pages in {status.elapsed_seconds}s "
+              f"({status.rate_limit_wait}s waiting on the rate limit)")
+    return 0 if status.status == "completed" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
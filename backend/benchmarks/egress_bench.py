@@ -0,0 +1,173 @@
+"""Egress pool throughput check against local stand-in proxies.
+
+Starts a stand-in Scholar origin that serves a fixture results page and answers
+429 once any single client address exceeds ``--origin-qps``, plus ``N`` stand-in
+forward proxies that each present a distinct client address to the origin. It then
+crawls through 1..N proxies and reports pages/sec, 429s and per-identity health,
+which should scale roughly linearly with the number of identities.
+
+    cd backend && python benchmarks/egress_bench.py [--proxies 4] [--pages 40] [--origin-qps 5]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.config import settings
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+async def read_head(reader: asyncio.StreamReader):
+    """Request or status line plus headers of one HTTP/1.1 message"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    first, *lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    return first, headers
+
+
+class StandInOrigin:
+    """Serves the fixture page, rate limiting each client address like Scholar does"""
+
+    def __init__(self, qps: float):
+        self.qps = qps
+        self.page = (FIXTURES / "scholar_page_1.html").read_bytes()
+        self.last_seen = defaultdict(float)
+        self.served = 0
+        self.rejected = 0
+
+    async def handle(self, reader, writer):
+        try:
+            await read_head(reader)
+            client = writer.get_extra_info("peername")[0]
+            now = time.monotonic()
+            status, body = 200, self.page
+            if now - self.last_seen[client] < 1.0 / self.qps:
+                status, body = 429, b"Too Many Requests"
+                self.rejected += 1
+            else:
+                self.last_seen[client] = now
+                self.served += 1
+            writer.write(
+                f"HTTP/1.1 {status} X\r\nContent-Type: text/html\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class StandInProxy:
+    """Minimal HTTP forward proxy connecting to the origin from its own loopback address"""
+
+    def __init__(self, source_address: str):
+        self.source_address = source_address
+        self.forwarded = 0
+
+    async def handle(self, reader, writer):
+        try:
+            request_line, headers = await read_head(reader)
+            method, url, _ = request_line.split(" ", 2)
+            target = urlsplit(url)
+            upstream_reader, upstream_writer = await asyncio.open_connection(
+                target.hostname, target.port or 80, local_addr=(self.source_address, 0)
+            )
+            path = target.path + ("?" + target.query if target.query else "")
+            forwarded = "".join(
+                f"{name}: {value}\r\n" for name, value in headers.items()
+                if name not in ("connection", "proxy-connection")
+            )
+            upstream_writer.write(f"{method} {path} HTTP/1.1\r\n{forwarded}Connection: close\r\n\r\n".encode())
+            await upstream_writer.drain()
+            response = await upstream_reader.read()
+            upstream_writer.close()
+            self.forwarded += 1
+            writer.write(response)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def reset_pool(proxies):
+    """Rebuild the process-wide egress pool, limiters and throttles for a new identity count"""
+    from services import egress_pool, rate_limiter, retry
+
+    settings.egress_proxies = proxies
+    egress_pool._egress_pool = None
+    rate_limiter._limiters.clear()
+    retry._throttles.clear()
+
+
+async def crawl(num_pages: int):
+    from services.egress_pool import get_egress_pool
+    from services.original_spider import OriginalScholarSpider
+
+    started = time.perf_counter()
+    async with OriginalScholarSpider() as spider:
+        pages = 0
+        async for _, articles in spider.iter_search("egress bench", num_results=num_pages * settings.results_per_page):
+            pages += 1 if articles else 0
+    return pages, time.perf_counter() - started, get_egress_pool().stats()
+
+
+async def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--proxies", type=int, default=4, help="largest number of stand-in proxies")
+    arg_parser.add_argument("--pages", type=int, default=40, help="result pages per crawl")
+    arg_parser.add_argument("--origin-qps", type=float, default=5.0, help="origin's per-address request limit")
+    args = arg_parser.parse_args()
+
+    origin = StandInOrigin(args.origin_qps)
+    origin_server = await asyncio.start_server(origin.handle, "127.0.0.1", 0)
+    origin_port = origin_server.sockets[0].getsockname()[1]
+
+    # Each proxy reaches the origin from a different loopback address (127.0.0.2, 127.0.0.3, ...)
+    proxy_urls = []
+    proxy_servers = []
+    for i in range(args.proxies):
+        proxy = StandInProxy(f"127.0.0.{i + 2}")
+        server = await asyncio.start_server(proxy.handle, "127.0.0.1", 0)
+        proxy_servers.append(server)
+        proxy_urls.append(f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}")
+
+    settings.google_scholar_base_url = f"http://127.0.0.1:{origin_port}"
+    settings.page_cache_enabled = False
+    settings.use_selenium_fallback = False
+    settings.rate_limit_backend = "memory"
+    # Pace each identity under the origin's limit, leaving room for network jitter
+    settings.rate_limit_qps = args.origin_qps * 0.75
+    settings.rate_limit_burst = 1
+    settings.retry_backoff_base = 0.2
+
+    print(f"{'identities':>10}{'pages':>8}{'seconds':>9}{'pages/s':>9}{'429s':>6}")
+    counts = sorted({1, *range(2, args.proxies + 1, 2), args.proxies})
+    for count in counts:
+        reset_pool(proxy_urls[:count])
+        rejected_before = origin.rejected
+        pages, elapsed, stats = await crawl(args.pages)
+        print(f"{count:>10}{pages:>8}{elapsed:>9.2f}{pages / elapsed:>9.2f}{origin.rejected - rejected_before:>6}")
+
+    print("\nIdentity health after the last run:")
+    for identity in stats:
+        print(f"  {identity['name']}: {identity['requests']} requests, latency {identity['latency'] * 1000:.0f} ms, "
+              f"block rate {identity['block_rate']:.0%}, rate {identity['rate']}/s")
+
+    for server in (origin_server, *proxy_servers):
+        server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,218 @@
+"""End-to-end load benchmark against the offline Scholar mock.
+
+Starts ``benchmarks/mock_scholar.py`` and the backend (uvicorn, fresh SQLite database
+in a temp dir, page cache and search memo off, no rate limit) as subprocesses, then
+drives ``/api/search``, ``/api/export/{id}`` and ``/api/searches`` at each concurrency
+level. For every scenario it reports request latency p50/p95/p99 and requests/sec;
+for searches also Scholar pages/sec, and the backend's RSS after each level.
+
+    cd backend && python benchmarks/load_bench.py [--concurrency 1,4,16] [--requests 32] \\
+        [--num-results 50] [--latency 0.05] [--error-rate 0] [--captcha-rate 0] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from startup_bench import free_port
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def rss_mb(pid: int):
+    """(current, peak) resident set size of `pid` in MB, from /proc; None where unavailable"""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None, None
+    values = {}
+    for line in status.splitlines():
+        key, _, value = line.partition(":")
+        if key in ("VmRSS", "VmHWM"):
+            values[key] = int(value.split()[0]) / 1024
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+def start_server(args, port: int, cwd: Path, env=None) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args, "--port", str(port)], cwd=cwd, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def wait_until_up(url: str, timeout: float = 60.0):
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    sys.exit(f"{url} did not come up in time")
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, requests: list):
+    """Send `requests` (method, path, json) with at most `concurrency` in flight.
+
+    Returns per-request latencies, failure count and wall time."""
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    latencies = []
+    failures = 0
+
+    async def worker():
+        nonlocal failures
+        while not queue.empty():
+            method, path, body = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                # Read the whole body so streamed exports are timed to their last byte
+                await response.aread()
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            failures += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, failures, time.perf_counter() - started
+
+
+async def benchmark(args, backend_url: str, mock_url: str, backend_pid: int):
+    results = []
+    search_ids = []
+    sent = 0
+    async with httpx.AsyncClient(base_url=backend_url, timeout=600) as client, \
+            httpx.AsyncClient(base_url=mock_url) as mock:
+        for concurrency in args.concurrency:
+            searches = [
+                ("POST", "/api/search", {"keyword": f"load bench {sent + i}", "num_results": args.num_results,
+                                         "use_cache": False})
+                for i in range(args.requests)
+            ]
+            sent += args.requests
+            await mock.post("/reset")
+            latencies, failures, wall = await run_level(client, concurrency, searches)
+            pages = (await mock.get("/stats")).json()["requests"]
+            results.append(("search", concurrency, latencies, failures, wall, pages))
+
+            history = (await client.get("/api/searches/summary", params={"limit": 100})).json()
+            search_ids = [item["id"] for item in history["items"]]
+
+            exports = [("GET", f"/api/export/{search_ids[i % len(search_ids)]}?format=csv", None)
+                       for i in range(args.requests)]
+            latencies, failures, wall = await run_level(client, concurrency, exports)
+            results.append(("export", concurrency, latencies, failures, wall, None))
+
+            listings = [("GET", "/api/searches?limit=20", None) for _ in range(args.requests)]
+            latencies, failures, wall = await run_level(client, concurrency, listings)
+            results.append(("searches", concurrency, latencies, failures, wall, None))
+
+            rss, peak = rss_mb(backend_pid)
+            results.append(("rss", concurrency, rss, peak))
+    return results
+
+
+def report(results, json_path=None):
+    rows = []
+    print(f"{'scenario':<10}{'conc':>5}{'reqs':>6}{'fail':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'req/s':>8}{'pages/s':>9}")
+    for result in results:
+        if result[0] == "rss":
+            _, concurrency, rss, peak = result
+            if rss is not None:
+                print(f"{'  rss':<10}{concurrency:>5}  backend RSS {rss:.0f} MB (peak {peak:.0f} MB)")
+            rows.append({"scenario": "rss", "concurrency": concurrency, "rss_mb": rss, "peak_rss_mb": peak})
+            continue
+        scenario, concurrency, latencies, failures, wall, pages = result
+        row = {
+            "scenario": scenario,
+            "concurrency": concurrency,
+            "requests": len(latencies),
+            "failures": failures,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+            "requests_per_sec": len(latencies) / wall if wall else 0.0,
+            "pages_per_sec": pages / wall if pages is not None and wall else None,
+        }
+        rows.append(row)
+        pages_col = f"{row['pages_per_sec']:>9.1f}" if row["pages_per_sec"] is not None else f"{'-':>9}"
+        print(f"{scenario:<10}{concurrency:>5}{row['requests']:>6}{failures:>5}{row['p50_ms']:>9.1f}"
+              f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['requests_per_sec']:>8.1f}{pages_col}")
+    if json_path:
+        Path(json_path).write_text(json.dumps(rows, indent=2))
+        print(f"\nWrote {json_path}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--concurrency", default="1,4,16",
+                            type=lambda value: [int(v) for v in value.split(",")],
+                            help="comma-separated concurrency levels")
+    arg_parser.add_argument("--requests", type=int, default=32, help="requests per scenario per level")
+    arg_parser.add_argument("--num-results", type=int, default=50, help="num_results of each search")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="mock Scholar response latency")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="mock Scholar 503 rate")
+    arg_parser.add_argument("--captcha-rate", type=float, default=0.0, help="mock Scholar robot check rate")
+    arg_parser.add_argument("--json", help="also write the results to this file")
+    args = arg_parser.parse_args()
+
+    mock_port, backend_port = free_port(), free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    backend_url = f"http://127.0.0.1:{backend_port}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update({
+            "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/bench.db",
+            "GOOGLE_SCHOLAR_BASE_URL": mock_url,
+            "PAGE_CACHE_ENABLED": "false",
+            "SEARCH_MEMO_TTL": "0",
+            "RATE_LIMIT_BACKEND": "memory",
+            "RATE_LIMIT_QPS": "0",
+            "RETRY_BACKOFF_BASE": "0.05",
+            "USE_SELENIUM_FALLBACK": "false",
+        })
+        mock = start_server(
+            [str(BENCH_DIR / "mock_scholar.py"), "--latency", str(args.latency), "--error-rate", str(args.error_rate),
+             "--captcha-rate", str(args.captcha_rate), "--seed", "0"],
+            mock_port, BACKEND_DIR
+        )
+        backend = start_server(["-m", "uvicorn", "api.main:app", "--host", "127.0.0.1"], backend_port, BACKEND_DIR, env)
+        try:
+            wait_until_up(f"{mock_url}/stats")
+            wait_until_up(f"{backend_url}/api/health")
+            results = asyncio.run(benchmark(args, backend_url, mock_url, backend.pid))
+        finally:
+            for process in (backend, mock):
+                process.terminate()
+                process.wait()
+
+    report(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Offline stand-in for Google Scholar.
+
+Serves the recorded result pages in ``benchmarks/fixtures`` at ``/scholar`` with
+configurable latency, HTTP error rate and CAPTCHA rate, so the spider and API can be
+exercised and measured without touching the live site. ``GET /stats`` reports what
+was served and ``POST /reset`` clears the counters.
+
+    cd backend && python benchmarks/mock_scholar.py --port 8099 [--latency 0.05] [--error-rate 0.02]
+
+Point the backend at it with ``GOOGLE_SCHOLAR_BASE_URL=http://127.0.0.1:8099``.
+"""
+import argparse
+import asyncio
+import random
+from pathlib import Path
+
+from fastapi import FastAPI, Query
+from fastapi.responses import Response
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+RESULT_PAGES = [(FIXTURES / name).read_bytes() for name in ("scholar_page_1.html", "scholar_page_2.html")]
+EMPTY_PAGE = (FIXTURES / "scholar_empty.html").read_bytes()
+ROBOT_PAGE = (FIXTURES / "scholar_robot.html").read_bytes()
+
+
+def create_app(latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+               captcha_rate: float = 0.0, total_results: int = 1000, seed=None) -> FastAPI:
+    app = FastAPI(title="Mock Scholar")
+    rng = random.Random(seed)
+    stats = {"requests": 0, "pages": 0, "empty": 0, "errors": 0, "captchas": 0}
+
+    @app.get("/scholar")
+    async def scholar(start: int = 0, q: str = Query("")):
+        stats["requests"] += 1
+        delay = latency + rng.uniform(-jitter, jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = rng.random()
+        if roll < error_rate:
+            stats["errors"] += 1
+            return Response(b"Service Unavailable", status_code=503)
+        if roll < error_rate + captcha_rate:
+            stats["captchas"] += 1
+            return Response(ROBOT_PAGE, media_type="text/html")
+        if start >= total_results:
+            stats["empty"] += 1
+            return Response(EMPTY_PAGE, media_type="text/html")
+
+        stats["pages"] += 1
+        return Response(RESULT_PAGES[(start // 10) % len(RESULT_PAGES)], media_type="text/html")
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/reset")
+    async def reset():
+        for key in stats:
+            stats[key] = 0
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8099)
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="mean seconds before each response")
+    arg_parser.add_argument("--jitter", type=float, default=0.02, help="uniform +/- seconds around the latency")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 503")
+    arg_parser.add_argument("--captcha-rate", type=float, default=0.0, help="share of requests answered with a robot check")
+    arg_parser.add_argument("--total-results", type=int, default=1000, help="results before pages come back empty")
+    arg_parser.add_argument("--seed", type=int, default=None)
+    args = arg_parser.parse_args()
+
+    app = create_app(args.latency, args.jitter, args.error_rate, args.captcha_rate, args.total_results, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
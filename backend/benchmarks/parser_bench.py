@@ -0,0 +1,78 @@
+"""Parser backend parity check and micro-benchmark.
+
+Runs every available parser backend over the golden Scholar pages in
+``benchmarks/fixtures``, verifies each produces exactly the ArticleSchema output
+recorded in ``fixtures/expected``, and reports per-page parse time.
+
+    cd backend && python benchmarks/parser_bench.py [--rounds 200] [--update-golden]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from models.article import ArticleSchema
+from services.parsers import LXML_AVAILABLE, BeautifulSoupParser, get_parser
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+EXPECTED = FIXTURES / "expected"
+
+# citations_per_year depends on the current year, so the golden files leave it out
+VOLATILE_FIELDS = {"citations_per_year"}
+
+
+def parse_to_schema(parser, content: bytes):
+    return [
+        ArticleSchema(**fields).model_dump(exclude=VOLATILE_FIELDS) if fields else None
+        for fields in parser.parse(content)
+    ]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rounds", type=int, default=200, help="parses per page per backend")
+    arg_parser.add_argument("--update-golden", action="store_true",
+                            help="rewrite fixtures/expected from the html.parser backend")
+    args = arg_parser.parse_args()
+
+    backends = [BeautifulSoupParser.name] + (["lxml"] if LXML_AVAILABLE else [])
+    pages = sorted(FIXTURES.glob("*.html"))
+    failures = 0
+
+    if args.update_golden:
+        EXPECTED.mkdir(exist_ok=True)
+        reference = get_parser(BeautifulSoupParser.name)
+        for page in pages:
+            golden = parse_to_schema(reference, page.read_bytes())
+            (EXPECTED / f"{page.stem}.json").write_text(
+                json.dumps(golden, indent=2, ensure_ascii=False, default=str) + "\n", encoding="utf-8"
+            )
+        print(f"Wrote {len(pages)} golden files to {EXPECTED}")
+
+    print(f"{'page':<22}{'backend':<14}{'articles':>9}{'ms/page':>10}  parity")
+    for page in pages:
+        content = page.read_bytes()
+        golden = json.loads((EXPECTED / f"{page.stem}.json").read_text(encoding="utf-8"))
+        for name in backends:
+            parser = get_parser(name)
+            output = json.loads(json.dumps(parse_to_schema(parser, content), default=str))
+            ok = output == golden
+            failures += not ok
+
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                parser.parse(content)
+            per_page = (time.perf_counter() - started) * 1000 / args.rounds
+
+            print(f"{page.name:<22}{name:<14}{len(output):>9}{per_page:>10.3f}  {'ok' if ok else 'MISMATCH'}")
+
+    if not LXML_AVAILABLE:
+        print("lxml not installed: only the html.parser backend was checked")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Backend cold-start benchmark.
+
+Imports ``api.main`` in fresh interpreters with ``python -X importtime`` and reports
+the median cumulative import cost of the app's own modules and of each top-level
+third-party package. With ``--health`` it also starts uvicorn and times how long
+the first ``/api/health`` request takes to succeed.
+
+    cd backend && python benchmarks/startup_bench.py [--repeat 5] [--top 15] [--health]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+APP_PACKAGES = ("api", "core", "models", "services")
+
+
+def measure_imports():
+    """One cold import of api.main; returns (wall seconds, {module: cumulative us})"""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        sys.exit(f"import api.main failed:\n{proc.stderr[-2000:]}")
+
+    costs = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        module = name.rstrip()
+        depth = (len(module) - len(module.lstrip())) // 2
+        module = module.strip()
+        top = module.split(".")[0]
+        # App modules are reported individually; third-party packages by top-level name,
+        # counting only their outermost import so nested submodules are not double counted
+        if top in APP_PACKAGES:
+            costs[module] = int(cumulative)
+        elif depth <= 1 and top not in costs:
+            costs[top] = int(cumulative)
+    return wall, costs
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_health(timeout: float = 60.0) -> float:
+    """Seconds from launching uvicorn to the first successful /api/health response"""
+    import httpx
+
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=dict(os.environ)
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=1.0).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+        sys.exit("backend did not become healthy in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--repeat", type=int, default=5, help="cold imports to take the median of")
+    arg_parser.add_argument("--top", type=int, default=15, help="modules to list")
+    arg_parser.add_argument("--health", action="store_true", help="also time uvicorn start to first /api/health")
+    args = arg_parser.parse_args()
+
+    walls = []
+    samples = defaultdict(list)
+    for _ in range(args.repeat):
+        wall, costs = measure_imports()
+        walls.append(wall)
+        for module, cumulative in costs.items():
+            samples[module].append(cumulative)
+
+    medians = {module: statistics.median(values) for module, values in samples.items()}
+    total = medians.get("api.main", 0)
+
+    print(f"Cold 'import api.main': {total / 1000:.1f} ms import time, "
+          f"{statistics.median(walls) * 1000:.1f} ms interpreter wall time (median of {args.repeat})")
+    print(f"\n{'module':<40}{'cumulative ms':>14}{'share':>8}")
+    for module, cumulative in sorted(medians.items(), key=lambda item: -item[1])[:args.top]:
+        share = cumulative / total * 100 if total else 0
+        print(f"{module:<40}{cumulative / 1000:>14.1f}{share:>7.1f}%")
+
+    if args.health:
+        print(f"\nuvicorn start to first /api/health: {measure_health() * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,19 @@ class Settings(BaseSettings):
     app_version: str = "2.0.0"
     debug: bool = False
     
+    # Logging for the api, core and services packages; "text" or "json" (one object per line)
+    log_level: str = "INFO"
+    log_format: str = "text"
+    
     database_url: str = "sqlite+aiosqlite:///../data/scholar.db"
     
+    # SQLite connection tuning applied to every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64000  # negative means KiB, i.e. 64 MB
+    sqlite_busy_timeout: int = 5000  # milliseconds
+    
     cors_origins: list = ["http://localhost:3000", "http://localhost:5173"]
     
     google_scholar_base_url: str = "https://scholar.google.com"
@@ -25,8 +36,88 @@ class Settings(BaseSettings):
     max_search_results: int = 1000
     results_per_page: int = 10
     
+    # Concurrent page fetching: pages in flight per search
+    max_concurrent_requests: int = 3
+    
+    # Token bucket shared by all searches; the sqlite backend also shares it across worker processes
+    rate_limit_qps: float = 2.0
+    rate_limit_burst: int = 3
+    rate_limit_backend: str = "sqlite"  # "sqlite" or "memory"
+    rate_limit_db_path: str = "../data/rate_limit.db"
+    
+    # Retries (up to max_retries) back off exponentially with jitter on 429/5xx and robot pages,
+    # and every block lowers the shared rate (never below rate_limit_min_qps)
+    retry_backoff_base: float = 2.0
+    retry_backoff_max: float = 60.0
+    rate_limit_min_qps: float = 0.1
+    throttle_decrease_factor: float = 0.5
+    throttle_increase_step: float = 0.05
+    throttle_window: int = 50
+    throttle_block_rate_threshold: float = 0.05
+    
+    # Egress pool: proxy URLs ("direct" for no proxy), each an identity with its own rate
+    # limit, and User-Agent strings that every identity rotates through within that limit.
+    # Empty lists mean one direct identity sending user_agent.
+    egress_proxies: list = []
+    egress_user_agents: list = []
+    egress_accept_language: str = "en-US,en;q=0.9"
+    egress_block_cooldown: float = 60.0  # seconds a blocked identity is skipped
+    
+    # Sharded search: Scholar stops paginating a query after about this many hits, so
+    # windows over it are split by year, starting from shard_start_year when none is given
+    scholar_result_ceiling: int = 1000
+    shard_start_year: int = 1900
+    
+    # Incremental citation refresh: articles older than max_age (seconds) are re-checked by
+    # re-fetching only their pages; interval > 0 also refreshes up to batch searches that often
+    citation_refresh_max_age: int = 7 * 24 * 3600
+    citation_refresh_interval: int = 0
+    citation_refresh_batch: int = 10
+    
+    # Crawl checkpoints: a running search whose checkpoint is older than stale_after seconds
+    # was interrupted (e.g. by a restart) and is resumed from its next page; scanned every
+    # resume_interval seconds, 0 disables resuming
+    crawl_checkpoint_stale_after: int = 300
+    crawl_resume_interval: int = 60
+    
+    # Crawl queue: with crawl_queue_enabled the API only enqueues crawls into the crawl_jobs
+    # table and `python worker.py` processes run them. A worker leases each job for
+    # crawl_job_lease seconds and renews the lease every crawl_job_heartbeat seconds; a
+    # lapsed lease (dead worker) lets another worker take the job over from its checkpoint,
+    # up to crawl_job_max_attempts claims
+    crawl_queue_enabled: bool = False
+    crawl_job_lease: int = 60
+    crawl_job_heartbeat: int = 15
+    crawl_job_max_attempts: int = 3
+    crawl_worker_concurrency: int = 4  # Jobs one worker process crawls at once, sharing its rate budget
+    crawl_worker_poll_interval: float = 1.0
+    crawl_queue_sync_timeout: int = 300  # Seconds POST /api/search waits for a queued crawl
+    
+    # On-disk cache of fetched result pages (TTL in seconds, size cap with LRU eviction)
+    page_cache_enabled: bool = True
+    page_cache_path: str = "../data/page_cache.db"
+    page_cache_ttl: int = 86400
+    page_cache_max_bytes: int = 256 * 1024 * 1024
+    
+    # Result page parser backend: "auto" (lxml when installed), "lxml" or "html.parser"
+    html_parser: str = "auto"
+    # Worker processes for parsing result pages off the event loop (0 parses inline)
+    parse_workers: int = 0
+    
+    # Rows per executemany batch when storing search results
+    bulk_insert_chunk_size: int = 500
+    
+    # Rows fetched per server-side cursor batch when streaming exports
+    export_chunk_size: int = 1000
+    
+    # Serve identical searches finished within this many seconds from the database (0 disables)
+    search_memo_ttl: int = 3600
+    
     selenium_driver_path: Optional[str] = None
     use_selenium_fallback: bool = True
+    selenium_pool_size: int = 1
+    selenium_headless: bool = False  # CAPTCHAs can only be solved by hand in a visible browser
+    selenium_captcha_timeout: int = 120
     
     class Config:
         env_file = ".env"
@@ -1,7 +1,9 @@
+from sqlalchemy import event, inspect
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from core.config import settings
 from models.base import Base
+from core.migrations import run_migrations
 import os
 
 
@@ -13,6 +15,20 @@ engine = create_async_engine(
     future=True
 )
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune every new SQLite connection: WAL lets readers proceed during a search commit"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        cursor.execute(f"PRAGMA cache_size={settings.sqlite_cache_size}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
 AsyncSessionLocal = sessionmaker(
     engine,
     class_=AsyncSession,
@@ -22,7 +38,9 @@ AsyncSessionLocal = sessionmaker(
 
 async def init_db():
     async with engine.begin() as conn:
+        fresh = not await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("searches"))
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations, fresh)
 
 
 async def get_db():
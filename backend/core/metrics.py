@@ -0,0 +1,198 @@
+"""Process-local metrics in the Prometheus text exposition format.
+
+A deliberately small subset of prometheus_client (counters, gauges and histograms
+with labels), so /metrics needs no extra dependency. With several worker processes
+each one reports its own values.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+# Seconds; covers sub-millisecond parses up to multi-minute crawls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        # Unlabelled metrics are exported from the start, as zero
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        REGISTRY.register(self)
+
+    def _new_child(self):
+        return 0.0
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._children.get(self._key(labels), 0.0)
+
+    def _render_child(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def value(self, **labels) -> float:
+        return self._children.get(self._key(labels), 0.0)
+
+    def _render_child(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    child["counts"][i] += 1
+                    break
+            child["sum"] += value
+            child["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block, also when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_child(self, key, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, child["counts"]):
+            cumulative += count
+            labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child['sum'])}")
+        lines.append(f"{self.name}_count{labels} {child['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Crawl hot path
+PAGE_FETCH_SECONDS = Histogram(
+    "scholar_page_fetch_seconds", "Time to fetch one result page, including retries and backoff", ("outcome",)
+)
+PAGE_PARSE_SECONDS = Histogram("scholar_page_parse_seconds", "Time to parse one result page", ("parser",))
+DB_INSERT_SECONDS = Histogram("scholar_db_insert_seconds", "Time to bulk insert one batch of articles")
+ARTICLES_STORED = Counter(
+    "scholar_articles_stored_total", "Articles stored for a search, by whether the paper was new or already known", ("result",)
+)
+EXPORT_SECONDS = Histogram("scholar_export_seconds", "Time to produce a complete export", ("format",))
+FETCH_RETRIES = Counter("scholar_fetch_retries_total", "Page fetch attempts that were retried", ("reason",))
+ROBOT_DETECTIONS = Counter("scholar_robot_detections_total", "Responses that were a robot check page")
+SELENIUM_FALLBACKS = Counter("scholar_selenium_fallbacks_total", "Pages handed to the browser pool", ("result",))
+PARSE_FAILURES = Counter("scholar_parse_failures_total", "Result divs that could not be parsed into an article")
+PAGE_CACHE_HITS = Counter("scholar_page_cache_hits_total", "Result pages served from the page cache")
+CITATION_REFRESH_PAGES = Counter("scholar_citation_refresh_pages_total", "Result pages fetched by citation refreshes")
+CITATIONS_UPDATED = Counter("scholar_citations_updated_total", "Articles whose citation count changed on refresh")
+SEARCHES_IN_FLIGHT = Gauge("scholar_searches_in_flight", "Searches currently crawling", ("mode",))
+
+# API
+API_REQUEST_SECONDS = Histogram(
+    "scholar_api_request_seconds", "API request latency until the response starts", ("method", "route", "status")
+)
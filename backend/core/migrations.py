@@ -0,0 +1,163 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str):
+    """ALTER TABLE ... ADD COLUMN, skipped when create_all already made the column"""
+    columns = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _v1_article_rank(conn: Connection):
+    _add_column(conn, "articles", "rank", "INTEGER")
+
+
+def _v2_query_indexes(conn: Connection):
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_articles_search_id_rank ON articles (search_id, rank)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_search_id_citations ON articles (search_id, citations)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_search_id_citations_per_year ON articles (search_id, citations_per_year)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_search_id_year ON articles (search_id, year)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_title ON articles (title)",
+        "CREATE INDEX IF NOT EXISTS ix_searches_created_at_id ON searches (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_searches_query ON searches (keyword, start_year, end_year, created_at)",
+    ):
+        conn.execute(text(statement))
+
+
+def _v3_search_page_outcomes(conn: Connection):
+    _add_column(conn, "searches", "page_outcomes", "JSON")
+
+
+def _v4_citation_refresh(conn: Connection):
+    _add_column(conn, "articles", "refreshed_at", "TIMESTAMP")
+    _add_column(conn, "searches", "refreshed_at", "TIMESTAMP")
+
+
+def _v5_search_mode(conn: Connection):
+    _add_column(conn, "searches", "mode", "VARCHAR(20) DEFAULT 'standard'")
+
+
+def _v6_crawl_checkpoints(conn: Connection):
+    _add_column(conn, "searches", "status", "VARCHAR(20)")
+    _add_column(conn, "searches", "checkpoint", "JSON")
+    _add_column(conn, "searches", "checkpoint_at", "TIMESTAMP")
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_searches_status_checkpoint_at ON searches (status, checkpoint_at)"
+    ))
+
+
+def _v7_canonical_articles(conn: Connection):
+    """Fold per-search article copies into one row per paper linked from search_articles"""
+    from services.fingerprint import normalize_title, paper_fingerprint
+
+    _add_column(conn, "articles", "fingerprint", "VARCHAR(600)")
+    rows = conn.execute(text(
+        "SELECT id, title, year, url, search_id, rank, created_at, refreshed_at FROM articles "
+        "ORDER BY search_id, rank IS NULL, rank, id"
+    )).all()
+
+    # Per paper, the most recently observed copy survives, with its citation count. A title
+    # that normalizes to nothing says too little to call two rows one paper: such rows are
+    # never folded, and only the first of them with a given fallback fingerprint keeps it.
+    fingerprints = {}
+    seen = set()
+    for row in rows:
+        fingerprint = paper_fingerprint(row.title, row.year, row.url)
+        if not normalize_title(row.title) and fingerprint in seen:
+            fingerprint = f"{fingerprint}#{row.id}"
+        fingerprints[row.id] = fingerprint
+        seen.add(fingerprint)
+    observed = {row.id: str(row.refreshed_at or row.created_at or "") for row in rows}
+    survivors = {}
+    for row in rows:
+        fingerprint = fingerprints[row.id]
+        current = survivors.get(fingerprint)
+        if current is None or observed[row.id] >= observed[current.id]:
+            survivors[fingerprint] = row
+
+    survivor_ids = {}
+    links = {}
+    positions = {}
+    for row in rows:
+        fingerprint = fingerprints[row.id]
+        survivor_ids[row.id] = survivors[fingerprint].id
+        if row.search_id is None:
+            continue
+        # Articles stored before ranks existed are numbered in insertion order, after the ranked ones
+        position = positions[row.search_id] = positions.get(row.search_id, 0) + 1
+        links.setdefault((row.search_id, survivors[fingerprint].id), row.rank or position)
+
+    if survivors:
+        conn.execute(
+            text("UPDATE articles SET fingerprint = :fingerprint WHERE id = :id"),
+            [{"fingerprint": fingerprint, "id": row.id} for fingerprint, row in survivors.items()]
+        )
+    if links:
+        conn.execute(
+            text("INSERT INTO search_articles (search_id, article_id, rank) VALUES (:search_id, :article_id, :rank)"),
+            [{"search_id": search_id, "article_id": article_id, "rank": rank}
+             for (search_id, article_id), rank in links.items()]
+        )
+    duplicates = [{"id": old, "survivor": new} for old, new in survivor_ids.items() if old != new]
+    if duplicates:
+        conn.execute(text("UPDATE citation_history SET article_id = :survivor WHERE article_id = :id"), duplicates)
+        conn.execute(text("DELETE FROM articles WHERE id = :id"), duplicates)
+
+    # The per-search columns stay on old databases, unused; their indexes go
+    conn.execute(text("UPDATE articles SET search_id = NULL, rank = NULL"))
+    for index in ("rank", "citations", "citations_per_year", "year"):
+        conn.execute(text(f"DROP INDEX IF EXISTS ix_articles_search_id_{index}"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_articles_fingerprint ON articles (fingerprint)"))
+
+
+
+def _v8_unicode_fingerprints(conn: Connection):
+    """Re-fingerprint articles stored while titles were transcoded to ASCII.
+
+    Rows are not folded here: a row whose new fingerprint another row already holds
+    keeps its old one.
+    """
+    from services.fingerprint import paper_fingerprint
+
+    rows = conn.execute(text("SELECT id, fingerprint, title, year, url FROM articles ORDER BY id")).all()
+    taken = {row.fingerprint for row in rows}
+    changes = []
+    for row in rows:
+        fingerprint = paper_fingerprint(row.title, row.year, row.url)
+        if fingerprint != row.fingerprint and fingerprint not in taken:
+            taken.add(fingerprint)
+            changes.append({"fingerprint": fingerprint, "id": row.id})
+    if changes:
+        conn.execute(text("UPDATE articles SET fingerprint = :fingerprint WHERE id = :id"), changes)
+
+
+# Ordered (version, migration) pairs; append new entries, never edit applied ones
+MIGRATIONS = [
+    (1, _v1_article_rank),
+    (2, _v2_query_indexes),
+    (3, _v3_search_page_outcomes),
+    (4, _v4_citation_refresh),
+    (5, _v5_search_mode),
+    (6, _v6_crawl_checkpoints),
+    (7, _v7_canonical_articles),
+    (8, _v8_unicode_fingerprints),
+]
+
+
+def run_migrations(conn: Connection, fresh: bool = False):
+    """Apply every migration newer than the recorded schema version.
+
+    A `fresh` database was just created from the current models, so the migrations
+    are only recorded; older ones may refer to columns the models no longer have.
+    """
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER PRIMARY KEY, applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    current = conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+    for version, migration in MIGRATIONS:
+        if version > current:
+            if not fresh:
+                migration(conn)
+            conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": version})
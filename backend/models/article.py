@@ -1,31 +1,53 @@
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey
+from pydantic import BaseModel, Field, field_validator
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 
 from models.base import Base
 
 
 class ArticleDB(Base):
+    """One row per paper, shared by every search that found it (see SearchArticleDB)"""
     __tablename__ = "articles"
     
     id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(600))  # services.fingerprint.article_fingerprint: normalized title and year
     title = Column(String(500), nullable=False)
     authors = Column(Text)  # 原始作者字符串
     # main_author_id = Column(Integer, ForeignKey("authors.id"))  # 第一作者ID
     venue = Column(String(300))
     publisher = Column(String(200))
     year = Column(Integer)
-    citations = Column(Integer, default=0)
+    citations = Column(Integer, default=0)  # Latest count seen by any search or refresh
     citations_per_year = Column(Float, default=0.0)
     description = Column(Text)
     url = Column(String(500))
-    search_id = Column(Integer, ForeignKey("searches.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    refreshed_at = Column(DateTime)  # Last time the citation count was re-checked
     
-    search = relationship("SearchDB", back_populates="articles")
+    citation_history = relationship("CitationHistoryDB", cascade="all, delete-orphan")
     # author_obj = relationship("AuthorDB", back_populates="papers")
+    
+    __table_args__ = (
+        Index("ix_articles_fingerprint", "fingerprint", unique=True),
+        Index("ix_articles_title", "title"),
+    )
+
+
+class SearchArticleDB(Base):
+    """Link between a search and an article it returned, with the article's rank in that search"""
+    __tablename__ = "search_articles"
+    
+    search_id = Column(Integer, ForeignKey("searches.id"), primary_key=True)
+    article_id = Column(Integer, ForeignKey("articles.id"), primary_key=True)
+    rank = Column(Integer, nullable=False)  # 1-based position in Scholar's relevance order
+    
+    # Article reads go by search in rank order; deleting a search checks which articles are still linked
+    __table_args__ = (
+        Index("ix_search_articles_search_id_rank", "search_id", "rank"),
+        Index("ix_search_articles_article_id", "article_id"),
+    )
 
 
 class SearchDB(Base):
@@ -36,9 +58,65 @@ class SearchDB(Base):
     start_year = Column(Integer)
     end_year = Column(Integer)
     total_results = Column(Integer, default=0)
+    page_outcomes = Column(JSON)  # Per-page fetch outcome, status, attempts and backoff
+    mode = Column(String(20), default="standard")  # "standard" or "sharded" (year-window crawl)
+    status = Column(String(20))  # running, completed or failed; NULL for searches stored before checkpoints
+    checkpoint = Column(JSON)  # next_start, pages_done and the crawl's num_results/use_cache, saved per page
+    checkpoint_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    refreshed_at = Column(DateTime)  # Last incremental citation refresh
+    
+    # Read-only: links are written and removed by services.persistence
+    articles = relationship(
+        "ArticleDB", secondary="search_articles", order_by="SearchArticleDB.rank", viewonly=True
+    )
+    
+    __table_args__ = (
+        # History pagination and the recent identical search lookup
+        Index("ix_searches_created_at_id", "created_at", "id"),
+        Index("ix_searches_query", "keyword", "start_year", "end_year", "created_at"),
+        Index("ix_searches_status_checkpoint_at", "status", "checkpoint_at"),
+    )
+
+
+class CitationHistoryDB(Base):
+    """Citation count of an article whenever a refresh saw it change"""
+    __tablename__ = "citation_history"
     
-    articles = relationship("ArticleDB", back_populates="search", cascade="all, delete-orphan")
+    id = Column(Integer, primary_key=True)
+    article_id = Column(Integer, ForeignKey("articles.id"), nullable=False)
+    citations = Column(Integer, nullable=False)
+    recorded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_citation_history_article_id_recorded_at", "article_id", "recorded_at"),
+    )
+
+
+class CrawlJobDB(Base):
+    """A crawl waiting in the durable queue or leased by a worker process (crawl_queue_enabled)"""
+    __tablename__ = "crawl_jobs"
+    
+    id = Column(Integer, primary_key=True)
+    search_id = Column(Integer, ForeignKey("searches.id"), nullable=False)
+    kind = Column(String(20), nullable=False, default="search")  # search or sharded
+    request = Column(JSON, nullable=False)  # The SearchRequest / ShardedSearchRequest fields
+    batch_id = Column(String(40))
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed
+    attempts = Column(Integer, nullable=False, default=0)  # Claims so far; also the claim's version number
+    lease_owner = Column(String(200))
+    lease_expires_at = Column(DateTime)  # Renewed by the owner's heartbeat; past it any worker may claim the job
+    progress = Column(JSON)  # Latest SearchJobStatus reported by the owner
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index("ix_crawl_jobs_status_id", "status", "id"),
+        Index("ix_crawl_jobs_search_id", "search_id"),
+        Index("ix_crawl_jobs_batch_id", "batch_id"),
+    )
 
 
 class ArticleSchema(BaseModel):
@@ -58,6 +136,15 @@ class ArticleSchema(BaseModel):
         from_attributes = True
 
 
+class PageOutcome(BaseModel):
+    start: int
+    outcome: str  # ok, cached, browser, robot, http_error, error
+    status: Optional[int] = None
+    attempts: int = 0
+    backoff: float = 0.0
+    egress: Optional[str] = None  # Identity used by the last attempt
+
+
 class SearchSchema(BaseModel):
     id: Optional[int] = None
     keyword: str
@@ -71,12 +158,118 @@ class SearchSchema(BaseModel):
         from_attributes = True
 
 
+class SearchDetailSchema(SearchSchema):
+    page_outcomes: Optional[List[PageOutcome]] = None
+    next_cursor: Optional[str] = None
+
+
+class SearchSummary(BaseModel):
+    id: int
+    keyword: str
+    start_year: Optional[int] = None
+    end_year: Optional[int] = None
+    total_results: int = 0
+    created_at: Optional[datetime] = None
+    article_count: Optional[int] = None
+
+
+class SearchHistoryPage(BaseModel):
+    items: List[SearchSummary]
+    next_cursor: Optional[str] = None
+
+
 class SearchRequest(BaseModel):
     keyword: str = Field(..., min_length=1, max_length=200)
     num_results: int = Field(50, ge=10, le=1000)
     start_year: Optional[int] = Field(None, ge=1900, le=datetime.now().year)
     end_year: Optional[int] = Field(None, ge=1900, le=datetime.now().year)
     sort_by: str = Field("citations", pattern="^(citations|citations_per_year|year)$")
+    use_cache: bool = True
+
+
+class ShardedSearchRequest(SearchRequest):
+    # Sharding exists to get past Scholar's ~1000 hits per query, so allow far more
+    num_results: int = Field(5000, ge=10, le=100000)
+
+
+class SearchShard(BaseModel):
+    start_year: int
+    end_year: int
+    estimated_results: Optional[int] = None
+    saturated: bool = False  # Single year still over the ceiling; only its first pages are reachable
+    failed: bool = False  # First page could not be fetched, so the window was skipped
+    articles_new: int = 0
+
+
+class SearchJobStatus(BaseModel):
+    search_id: int
+    keyword: str
+    status: str  # queued, running, completed, failed
+    pages_total: int = 0
+    pages_done: int = 0
+    articles_parsed: int = 0
+    elapsed_seconds: float = 0.0
+    eta_seconds: Optional[float] = None
+    insert_ms: float = 0.0
+    page_outcomes: List[PageOutcome] = []
+    shards: Optional[List[SearchShard]] = None
+    error: Optional[str] = None
+
+
+class BatchSearchRequest(BaseModel):
+    keywords: List[str] = Field(..., min_length=1, max_length=200)
+    num_results: int = Field(50, ge=10, le=1000)
+    start_year: Optional[int] = Field(None, ge=1900, le=datetime.now().year)
+    end_year: Optional[int] = Field(None, ge=1900, le=datetime.now().year)
+    use_cache: bool = True
+
+    @field_validator("keywords")
+    @classmethod
+    def _distinct_keywords(cls, keywords: List[str]) -> List[str]:
+        # The same keyword twice would only crawl the same pages twice
+        distinct = list(dict.fromkeys(keyword.strip() for keyword in keywords if keyword.strip()))
+        if not distinct:
+            raise ValueError("at least one non-empty keyword is required")
+        if any(len(keyword) > 200 for keyword in distinct):
+            raise ValueError("keywords are limited to 200 characters")
+        return distinct
+
+    def search_request(self, keyword: str) -> SearchRequest:
+        return SearchRequest(
+            keyword=keyword, num_results=self.num_results,
+            start_year=self.start_year, end_year=self.end_year, use_cache=self.use_cache
+        )
+
+
+class BatchStatus(BaseModel):
+    batch_id: str
+    status: str  # queued, running, completed, failed (every search failed)
+    searches: List[SearchJobStatus]
+    pages_total: int = 0
+    pages_done: int = 0
+    articles_parsed: int = 0
+    elapsed_seconds: float = 0.0
+    eta_seconds: Optional[float] = None
+    rate_limit_wait: float = 0.0
+
+
+class CitationPoint(BaseModel):
+    citations: int
+    recorded_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class CitationRefreshResult(BaseModel):
+    search_id: int
+    articles_stale: int = 0
+    pages_fetched: int = 0
+    pages_total: int = 0
+    articles_checked: int = 0
+    articles_updated: int = 0
+    articles_unmatched: int = 0
+    refreshed_at: Optional[datetime] = None
 
 
 class SearchResponse(BaseModel):
@@ -84,4 +277,7 @@ class SearchResponse(BaseModel):
     keyword: str
     total_results: int
     articles: List[ArticleSchema]
+    rate_limit_wait: float = 0.0
+    insert_ms: Optional[float] = None
+    page_outcomes: List[PageOutcome] = []
     message: str = "Search completed successfully"
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""Multi-keyword batch searches.
+
+A batch creates one SearchDB per keyword and crawls them all through one
+CrawlScheduler, so a keyword list costs one spider and one shared rate budget
+instead of one independently paced crawl per keyword. Keywords with a fresh
+identical search are answered from it without crawling, like single searches.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.article import BatchSearchRequest, BatchStatus, SearchDB, SearchJobStatus
+from services.crawl_scheduler import CrawlScheduler
+from services.original_spider import OriginalScholarSpider
+from services.persistence import begin_checkpoint, find_recent_search
+from services.search_jobs import SearchJob, register_job, run_search_job
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchJob:
+    """Progress of a batch: one SearchJob per keyword, in request order"""
+    batch_id: str
+    jobs: List[SearchJob]
+    spider: Optional[OriginalScholarSpider] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        return batch_state([job.status for job in self.jobs], started=self.started_at is not None)
+
+    def to_status(self) -> BatchStatus:
+        end = self.finished_at or time.time()
+        return summarize_batch(
+            self.batch_id, [job.to_status() for job in self.jobs],
+            elapsed=end - self.started_at if self.started_at else 0.0,
+            rate_limit_wait=self.spider.rate_limit_wait if self.spider else 0.0
+        )
+
+
+def batch_state(statuses: List[str], started: bool) -> str:
+    if any(status in ("queued", "running") for status in statuses):
+        return "running" if started else "queued"
+    return "failed" if all(status == "failed" for status in statuses) else "completed"
+
+
+def summarize_batch(batch_id: str, searches: List[SearchJobStatus], elapsed: float,
+                    rate_limit_wait: float = 0.0) -> BatchStatus:
+    """Aggregate the keywords' job statuses into one batch status"""
+    pages_total = sum(search.pages_total for search in searches)
+    pages_done = sum(search.pages_done for search in searches)
+    status = batch_state([search.status for search in searches], started=elapsed > 0)
+    eta = None
+    if status == "running" and pages_done:
+        eta = round(elapsed / pages_done * max(0, pages_total - pages_done), 1)
+    elif status == "completed":
+        eta = 0.0
+    return BatchStatus(
+        batch_id=batch_id,
+        status=status,
+        searches=searches,
+        pages_total=pages_total,
+        pages_done=pages_done,
+        articles_parsed=sum(search.articles_parsed for search in searches),
+        elapsed_seconds=round(elapsed, 1),
+        eta_seconds=eta,
+        rate_limit_wait=round(rate_limit_wait, 2)
+    )
+
+
+_batches: Dict[str, BatchJob] = {}
+
+
+def _prune_batches():
+    """Forget finished batches once they are older than an hour, like search jobs"""
+    cutoff = time.time() - 3600
+    for batch_id in [bid for bid, batch in _batches.items() if batch.finished_at and batch.finished_at < cutoff]:
+        del _batches[batch_id]
+
+
+async def create_batch(db: AsyncSession, request: BatchSearchRequest) -> BatchJob:
+    """Create the batch's SearchDB records, reusing fresh identical searches, and one job per keyword"""
+    searches = []
+    for keyword in request.keywords:
+        search_request = request.search_request(keyword)
+        search_record = await find_recent_search(db, search_request)
+        cached = search_record is not None
+        if not cached:
+            search_record = SearchDB(keyword=keyword, start_year=request.start_year, end_year=request.end_year)
+            begin_checkpoint(search_record, search_request)
+            db.add(search_record)
+        searches.append((search_record, search_request, cached))
+    # Flushing assigns the new records' ids
+    await db.commit()
+
+    jobs = []
+    for search_record, search_request, cached in searches:
+        if cached:
+            jobs.append(SearchJob(
+                search_id=search_record.id, request=search_request, status="completed",
+                articles_parsed=search_record.total_results, pages_planned=0
+            ))
+        else:
+            jobs.append(SearchJob(search_id=search_record.id, request=search_request))
+    return BatchJob(batch_id=uuid.uuid4().hex, jobs=jobs)
+
+
+def register_batch(batch: BatchJob) -> BatchJob:
+    """Track `batch` in this process for status polling"""
+    _prune_batches()
+    _batches[batch.batch_id] = batch
+    return batch
+
+
+def get_batch(batch_id: str) -> Optional[BatchJob]:
+    return _batches.get(batch_id)
+
+
+async def run_batch(batch: BatchJob):
+    """Crawl every keyword that needs it through one spider and scheduler; each job commits its own pages"""
+    pending = [register_job(job) for job in batch.jobs if job.status == "queued"]
+    batch.started_at = time.time()
+    try:
+        if pending:
+            async with OriginalScholarSpider() as spider, CrawlScheduler(spider) as scheduler:
+                batch.spider = spider
+                await asyncio.gather(*(run_search_job(job, scheduler) for job in pending))
+    finally:
+        batch.finished_at = time.time()
+    logger.info(
+        "Batch %s finished: %d searches (%d crawled), %d articles in %.1fs",
+        batch.batch_id, len(batch.jobs), len(pending), sum(job.articles_parsed for job in batch.jobs),
+        batch.finished_at - batch.started_at, extra={"status": batch.status}
+    )
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _load_selenium():
+    """Import Selenium on first use (it is optional and slow to import); None when not installed"""
+    try:
+        from selenium import webdriver
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions
+        from selenium.webdriver.support.ui import WebDriverWait
+    except ImportError:
+        return None
+    return SimpleNamespace(
+        webdriver=webdriver, Options=Options, By=By, WebDriverWait=WebDriverWait,
+        expected_conditions=expected_conditions, TimeoutException=TimeoutException
+    )
+
+
+@dataclass
+class BrowserResult:
+    content: bytes
+    cookies: List[Dict]
+
+
+class BrowserPool:
+    """Long-lived Chrome drivers for pages that trip Scholar's robot check.
+
+    Each of the `size` executor threads owns one driver, created on first use and kept
+    for the life of the pool, so at most `size` browsers exist and none of their blocking
+    calls run on the event loop. Waits are explicit WebDriverWait conditions, not sleeps.
+    """
+
+    def __init__(self, size: int, headless: bool):
+        self.size = max(1, size)
+        self.headless = headless
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="browser")
+        self._local = threading.local()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+
+    def _create_driver(self):
+        selenium = _load_selenium()
+        chrome_options = selenium.Options()
+        chrome_options.add_argument("--disable-infobars")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        if self.headless:
+            chrome_options.add_argument("--headless=new")
+        driver = selenium.webdriver.Chrome(options=chrome_options)
+        with self._drivers_lock:
+            self._drivers.append(driver)
+        return driver
+
+    def _get_driver(self):
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            driver = self._local.driver = self._create_driver()
+        return driver
+
+    def _discard_driver(self):
+        driver = getattr(self._local, "driver", None)
+        self._local.driver = None
+        if driver is not None:
+            with self._drivers_lock:
+                if driver in self._drivers:
+                    self._drivers.remove(driver)
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def _fetch(self, url: str, robot_keywords: List[str]) -> Optional[BrowserResult]:
+        selenium = _load_selenium()
+        By = selenium.By
+
+        def is_robot_page(driver) -> bool:
+            source = driver.page_source
+            return any(kw in source for kw in robot_keywords)
+
+        try:
+            driver = self._get_driver()
+            logger.info("Opening URL with Selenium", extra={"url": url})
+            driver.get(url)
+            selenium.WebDriverWait(driver, settings.timeout).until(
+                selenium.expected_conditions.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+
+            if is_robot_page(driver):
+                if self.headless:
+                    logger.warning("CAPTCHA detected in headless browser, giving up on this page")
+                    return None
+                logger.warning("CAPTCHA detected! Solve it in the open browser window; "
+                               "the search will continue automatically")
+                try:
+                    selenium.WebDriverWait(driver, settings.selenium_captcha_timeout, poll_frequency=1).until(
+                        lambda d: not is_robot_page(d)
+                    )
+                except selenium.TimeoutException:
+                    logger.warning("CAPTCHA was not solved in time")
+                    return None
+                # Reload the original results page now that the session is trusted
+                driver.get(url)
+                selenium.WebDriverWait(driver, settings.timeout).until(
+                    selenium.expected_conditions.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+
+            content = driver.find_element(By.TAG_NAME, "body").get_attribute('innerHTML')
+            return BrowserResult(content=content.encode('utf-8'), cookies=driver.get_cookies())
+
+        except Exception as e:
+            logger.error("Selenium error: %s", e)
+            # The driver may be wedged; start a fresh one next time
+            self._discard_driver()
+            return None
+
+    async def fetch(self, url: str, robot_keywords: List[str]) -> Optional[BrowserResult]:
+        """Load `url` in a pooled browser off the event loop; returns page body and session cookies"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._fetch, url, robot_keywords)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        with self._drivers_lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+_browser_pool: Optional[BrowserPool] = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> Optional[BrowserPool]:
+    """Return the process-wide browser pool, or None when the Selenium fallback is off or unavailable"""
+    global _browser_pool
+    if not settings.use_selenium_fallback or not _load_selenium():
+        return None
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = BrowserPool(settings.selenium_pool_size, settings.selenium_headless)
+        return _browser_pool
+
+
+def shutdown_browser_pool():
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is not None:
+            _browser_pool.close()
+            _browser_pool = None
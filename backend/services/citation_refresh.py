@@ -0,0 +1,155 @@
+"""Incremental citation refresh.
+
+Instead of re-running a search (which would create a second SearchDB and article
+set), a refresh re-fetches only the result pages that hold stale articles, located
+by their stored rank, and updates citation counts in place. Every change is also
+appended to citation_history, so each article keeps a compact time series that only
+grows when its count actually moves.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.metrics import CITATION_REFRESH_PAGES, CITATIONS_UPDATED
+from models.article import ArticleDB, CitationRefreshResult, SearchArticleDB, SearchDB
+from services.fingerprint import normalize_title
+from services.original_spider import OriginalScholarSpider
+from services.persistence import record_citation_changes
+
+logger = logging.getLogger(__name__)
+
+
+async def refresh_search(db: AsyncSession, search: SearchDB, force: bool = False) -> CitationRefreshResult:
+    """Re-check the citation counts of `search`'s stale articles (all of them with `force`).
+
+    Raises ValueError for a sharded search: its ranks run across year windows, so they
+    do not locate result pages of a single query.
+    """
+    if search.mode == "sharded":
+        raise ValueError("Sharded searches cannot be refreshed page by page")
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=settings.citation_refresh_max_age)
+    per_page = settings.results_per_page
+
+    result = await db.execute(
+        select(
+            ArticleDB.id, ArticleDB.title, ArticleDB.url, SearchArticleDB.rank, ArticleDB.citations,
+            ArticleDB.created_at, ArticleDB.refreshed_at
+        )
+        .join(SearchArticleDB, SearchArticleDB.article_id == ArticleDB.id)
+        .where(SearchArticleDB.search_id == search.id)
+    )
+    rows = result.all()
+    # Articles are shared, so one refreshed through another search is not stale here either
+    stale = [row for row in rows if force or (row.refreshed_at or row.created_at) < cutoff]
+
+    # Only the pages holding stale articles
+    starts = sorted({(row.rank - 1) // per_page * per_page for row in stale})
+
+    refresh = CitationRefreshResult(
+        search_id=search.id, articles_stale=len(stale), pages_total=-(-len(rows) // per_page)
+    )
+
+    by_url = {row.url: row for row in rows if row.url}
+    # A title that normalizes to nothing cannot tell papers apart; such rows only match
+    # a result at their own rank
+    by_title = {}
+    untitled = {}
+    for row in rows:
+        key = normalize_title(row.title)
+        if key:
+            by_title[key] = row
+        else:
+            untitled[row.rank] = row
+    updates: Dict[int, dict] = {}
+    ranks = []
+    changed = []
+    if starts:
+        # A cached page is good enough when the cache expires sooner than articles go stale
+        use_cache = settings.page_cache_ttl <= settings.citation_refresh_max_age and not force
+        async with OriginalScholarSpider() as spider:
+            pages = spider.iter_pages(search.keyword, starts, search.start_year, search.end_year, use_cache)
+            try:
+                async for start, page_articles in pages:
+                    refresh.pages_fetched += 1
+                    for position, article in enumerate(page_articles or [], start=start + 1):
+                        key = normalize_title(article.title)
+                        row = by_url.get(article.url) or (by_title.get(key) if key else untitled.get(position))
+                        if row is None or row.id in updates:
+                            continue
+                        updates[row.id] = {
+                            "id": row.id,
+                            "citations": article.citations,
+                            "citations_per_year": article.citations_per_year,
+                            "refreshed_at": now,
+                        }
+                        ranks.append({"search_id": search.id, "article_id": row.id, "rank": position})
+                        if article.citations != row.citations:
+                            changed.append((row, article.citations))
+            finally:
+                await pages.aclose()
+        CITATION_REFRESH_PAGES.inc(refresh.pages_fetched)
+
+    if updates:
+        await db.execute(update(ArticleDB), list(updates.values()))
+        await db.execute(update(SearchArticleDB), ranks)
+    await record_citation_changes(db, changed, now)
+    CITATIONS_UPDATED.inc(len(changed))
+
+    search.refreshed_at = now
+    await db.commit()
+
+    refresh.articles_checked = len(updates)
+    refresh.articles_updated = len(changed)
+    refresh.articles_unmatched = sum(1 for row in stale if row.id not in updates)
+    refresh.refreshed_at = now
+    logger.info(
+        "Refreshed search %d: %d of %d pages fetched, %d articles checked, %d updated",
+        search.id, refresh.pages_fetched, refresh.pages_total, refresh.articles_checked, refresh.articles_updated,
+        extra={"unmatched": refresh.articles_unmatched}
+    )
+    return refresh
+
+
+async def refresh_stale_searches(limit: int) -> List[CitationRefreshResult]:
+    """Refresh up to `limit` searches, least recently refreshed first"""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.citation_refresh_max_age)
+    last_refresh = func.coalesce(SearchDB.refreshed_at, SearchDB.created_at)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(SearchDB.id)
+            .where(last_refresh < cutoff, or_(SearchDB.mode.is_(None), SearchDB.mode == "standard"))
+            .order_by(last_refresh)
+            .limit(limit)
+        )
+        search_ids = list(result.scalars())
+
+    results = []
+    for search_id in search_ids:
+        async with AsyncSessionLocal() as db:
+            search = await db.get(SearchDB, search_id)
+            if search is not None:
+                results.append(await refresh_search(db, search))
+    return results
+
+
+async def _refresh_loop():
+    while True:
+        try:
+            await refresh_stale_searches(settings.citation_refresh_batch)
+        except Exception as e:
+            logger.exception("Scheduled citation refresh failed: %s", e)
+        await asyncio.sleep(settings.citation_refresh_interval)
+
+
+def start_refresh_scheduler() -> Optional[asyncio.Task]:
+    """Start the periodic refresh task when settings.citation_refresh_interval is set"""
+    if settings.citation_refresh_interval <= 0:
+        return None
+    return asyncio.create_task(_refresh_loop())
@@ -0,0 +1,126 @@
+"""Resume crawls interrupted by a restart.
+
+Standard, job, stream and batch searches store every result page together with a
+checkpoint on their SearchDB (next start= offset, pages done, the crawl's target),
+so a restart loses at most the pages in flight. A live crawl also refreshes the
+checkpoint's time while a slow page is pending, so a search still marked running whose
+checkpoint has not moved for settings.crawl_checkpoint_stale_after seconds has lost
+its worker; the first process to claim it continues from the checkpoint, with ranks
+following the articles already stored. Resumed searches share one crawl scheduler
+and can be polled through /api/search/jobs/{search_id}. Sharded searches keep no
+page checkpoint, so an interrupted one is crawled again from the start.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.article import CrawlJobDB, SearchDB, SearchRequest, ShardedSearchRequest
+from services.batch_search import BatchJob, run_batch
+from services.job_queue import enqueue_job
+from services.search_jobs import SearchJob, active_search_ids, create_job, resume_from_checkpoint
+from services.sharded_search import run_sharded_job
+
+logger = logging.getLogger(__name__)
+
+
+async def claim_interrupted_searches(db: AsyncSession) -> List[SearchDB]:
+    """Running searches with a stale checkpoint, each claimed by bumping its checkpoint_at"""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=settings.crawl_checkpoint_stale_after)
+    # Searches owned by the crawl queue are recovered through their job's lease instead
+    queued = exists().where(CrawlJobDB.search_id == SearchDB.id, CrawlJobDB.status.in_(("queued", "running")))
+    result = await db.execute(
+        select(SearchDB)
+        .where(
+            SearchDB.status == "running", SearchDB.checkpoint_at < cutoff, ~queued,
+            # Crawls of this process keep their checkpoint fresh, but never resume one of them
+            SearchDB.id.notin_(active_search_ids())
+        )
+        .order_by(SearchDB.checkpoint_at)
+    )
+    claimed = []
+    for search in result.scalars().all():
+        # Only one process wins the conditional update, so a search is never resumed twice
+        won = await db.execute(
+            update(SearchDB)
+            .where(SearchDB.id == search.id, SearchDB.checkpoint_at == search.checkpoint_at)
+            .values(checkpoint_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if won.rowcount == 1:
+            claimed.append(search)
+    await db.commit()
+    return claimed
+
+
+def checkpoint_request(search: SearchDB) -> SearchRequest:
+    """The request an interrupted search was crawling, rebuilt from its row and checkpoint"""
+    checkpoint = search.checkpoint or {}
+    request_class = ShardedSearchRequest if search.mode == "sharded" else SearchRequest
+    return request_class(
+        keyword=search.keyword,
+        num_results=checkpoint.get("num_results", 50),
+        start_year=search.start_year,
+        end_year=search.end_year,
+        use_cache=checkpoint.get("use_cache", True)
+    )
+
+
+async def resume_interrupted_searches() -> int:
+    """Claim and finish every interrupted search; returns how many were resumed.
+
+    With the crawl queue enabled they are handed to the workers instead of crawled here.
+    """
+    async with AsyncSessionLocal() as db:
+        searches = await claim_interrupted_searches(db)
+        if searches and settings.crawl_queue_enabled:
+            for search in searches:
+                enqueue_job(db, search.id, checkpoint_request(search), kind="sharded" if search.mode == "sharded" else "search")
+            await db.commit()
+            logger.info("Queued %d interrupted searches for the crawl workers", len(searches))
+            return len(searches)
+    if not searches:
+        return 0
+
+    jobs = []
+    crawls = []
+    for search in searches:
+        if search.mode == "sharded":
+            logger.info("Restarting sharded search %d", search.id, extra={"keyword": search.keyword})
+            crawls.append(run_sharded_job(create_job(search.id, checkpoint_request(search))))
+            continue
+        job = SearchJob(search_id=search.id, request=checkpoint_request(search))
+        resume_from_checkpoint(job, search)
+        jobs.append(job)
+    for job in jobs:
+        logger.info(
+            "Resuming search %d at start=%d", job.search_id, job.start_offset,
+            extra={"keyword": job.request.keyword, "articles_stored": job.articles_parsed}
+        )
+    if jobs:
+        crawls.append(run_batch(BatchJob(batch_id=f"resume-{uuid.uuid4().hex}", jobs=jobs)))
+    await asyncio.gather(*crawls)
+    return len(searches)
+
+
+async def _resume_loop():
+    while True:
+        try:
+            await resume_interrupted_searches()
+        except Exception as e:
+            logger.exception("Resuming interrupted searches failed: %s", e)
+        await asyncio.sleep(settings.crawl_resume_interval)
+
+
+def start_resume_scheduler() -> Optional[asyncio.Task]:
+    """Start the periodic resume task unless settings.crawl_resume_interval is 0"""
+    if settings.crawl_resume_interval <= 0:
+        return None
+    return asyncio.create_task(_resume_loop())
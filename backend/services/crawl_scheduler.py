@@ -0,0 +1,82 @@
+"""One page queue for many concurrent searches.
+
+Searches started on their own each bring a spider, HTTP clients and a pacing loop,
+and compete for the rate budget in whatever order their requests happen to land.
+A CrawlScheduler instead serves every search of a batch from a single spider: all
+pages go into one priority queue drained by spider.max_in_flight workers, so the
+searches share connection pools and egress identities, and throughput is bounded
+by the rate budget alone.
+
+Pages are ordered by their start= offset before submission order, which interleaves
+searches fairly: every keyword's first page is fetched before anyone's second, so
+short searches finish early and no keyword waits behind another's long tail.
+"""
+import asyncio
+import itertools
+import logging
+from typing import Iterable, List, Tuple
+
+from services.original_spider import OriginalScholarSpider
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlScheduler:
+    """Fetches queued result pages for many searches through one spider"""
+
+    def __init__(self, spider: OriginalScholarSpider):
+        self.spider = spider
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._order = itertools.count()
+        self._workers: List[asyncio.Task] = []
+
+    async def __aenter__(self):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.spider.max_in_flight)]
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        # Nobody is left to fetch what is still queued
+        while not self._queue.empty():
+            *_, future = self._queue.get_nowait()
+            future.cancel()
+
+    @property
+    def pages_queued(self) -> int:
+        return self._queue.qsize()
+
+    async def _worker(self):
+        while True:
+            _, _, n, url, use_cache, future = await self._queue.get()
+            if future.done():
+                # The search stopped early (end of results) and cancelled its remaining pages
+                continue
+            content = await self.spider._fetch_page_safe(n, url, use_cache)
+            if not future.done():
+                future.set_result(content)
+
+    def submit(self, n: int, url: str, use_cache: bool = True) -> asyncio.Future:
+        """Queue the page at offset `n`; the future resolves to its content, or None if it could not be fetched"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((n, next(self._order), n, url, use_cache, future))
+        return future
+
+    async def iter_pages(self, gscholar_main_url: str, keyword: str, starts: Iterable[int],
+                         use_cache: bool = True):
+        """Queue the pages at `starts` and yield (start, content) in that order, like the spider's _iter_pages.
+
+        When the caller stops iterating, its pages that are still queued are dropped.
+        """
+        query = keyword.replace(' ', '+')
+        pages: List[Tuple[int, asyncio.Future]] = [
+            (n, self.submit(n, gscholar_main_url.format(str(n), query), use_cache)) for n in starts
+        ]
+        try:
+            for n, future in pages:
+                yield n, await future
+        finally:
+            for _, future in pages:
+                future.cancel()
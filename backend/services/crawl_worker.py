@@ -0,0 +1,112 @@
+"""Crawl worker: runs jobs from the durable crawl queue.
+
+One worker process serves up to settings.crawl_worker_concurrency jobs at a time. Its
+standard searches share one spider and CrawlScheduler, like a batch, so a worker's
+jobs split its rate budget fairly. Fetch and parse capacity scales by starting more
+worker processes, independently of the API's web workers.
+"""
+import asyncio
+import logging
+import os
+import socket
+from typing import Dict, Optional
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.article import CrawlJobDB, SearchDB
+from services.crawl_scheduler import CrawlScheduler
+from services.job_queue import claim_job, finish_job, job_request, release_job, renew_lease
+from services.original_spider import OriginalScholarSpider
+from services.search_jobs import SearchJob, resume_from_checkpoint, run_search_job
+from services.sharded_search import run_sharded_job
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlWorker:
+    def __init__(self, worker_id: Optional[str] = None, concurrency: Optional[int] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = max(1, concurrency or settings.crawl_worker_concurrency)
+        self._stopping = asyncio.Event()
+        self._running: Dict[int, asyncio.Task] = {}
+
+    def stop(self):
+        """Stop claiming jobs; running ones are handed back to the queue"""
+        self._stopping.set()
+
+    async def run(self):
+        logger.info("Crawl worker %s started", self.worker_id, extra={"concurrency": self.concurrency})
+        async with OriginalScholarSpider() as spider, CrawlScheduler(spider) as scheduler:
+            while not self._stopping.is_set():
+                job = None
+                if len(self._running) < self.concurrency:
+                    async with AsyncSessionLocal() as db:
+                        job = await claim_job(db, self.worker_id)
+                if job is not None:
+                    task = asyncio.create_task(self._run_job(job, scheduler))
+                    self._running[job.id] = task
+                    task.add_done_callback(lambda _, job_id=job.id: self._running.pop(job_id, None))
+                    continue
+                # No free slot or nothing queued
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), settings.crawl_worker_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            running = list(self._running.values())
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+        logger.info("Crawl worker %s stopped", self.worker_id)
+
+    async def _crawl(self, job: CrawlJobDB, search_job: SearchJob, scheduler: CrawlScheduler):
+        async with AsyncSessionLocal() as db:
+            search = await db.get(SearchDB, job.search_id)
+            if search is None:
+                search_job.status = "failed"
+                search_job.error = "Search was deleted"
+                return
+            # Sharded crawls keep no checkpoint and start over
+            if job.kind != "sharded":
+                resume_from_checkpoint(search_job, search)
+
+        if job.kind == "sharded":
+            await run_sharded_job(search_job)
+        else:
+            await run_search_job(search_job, scheduler)
+
+    async def _run_job(self, job: CrawlJobDB, scheduler: CrawlScheduler):
+        """Crawl one leased job, renewing the lease every heartbeat until it finishes"""
+        search_job = SearchJob(search_id=job.search_id, request=job_request(job))
+        logger.info("Claimed crawl job %d for search %d (attempt %d)", job.id, job.search_id, job.attempts,
+                    extra={"kind": job.kind, "keyword": search_job.request.keyword})
+        crawl = asyncio.create_task(self._crawl(job, search_job, scheduler))
+        try:
+            while True:
+                done, _ = await asyncio.wait({crawl}, timeout=settings.crawl_job_heartbeat)
+                if done:
+                    break
+                async with AsyncSessionLocal() as db:
+                    owned = await renew_lease(db, job.id, self.worker_id, search_job.to_status())
+                if not owned:
+                    logger.warning("Lost the lease on crawl job %d, abandoning it", job.id)
+                    crawl.cancel()
+                    await asyncio.gather(crawl, return_exceptions=True)
+                    return
+            crawl.result()
+        except asyncio.CancelledError:
+            crawl.cancel()
+            await asyncio.gather(crawl, return_exceptions=True)
+            async with AsyncSessionLocal() as db:
+                await release_job(db, job.id, self.worker_id)
+            logger.info("Released crawl job %d", job.id)
+            raise
+        except Exception as e:
+            logger.exception("Crawl job %d failed: %s", job.id, e)
+            search_job.status = "failed"
+            search_job.error = str(e)
+
+        async with AsyncSessionLocal() as db:
+            await finish_job(db, job.id, self.worker_id, search_job.to_status())
+        logger.info("Finished crawl job %d: %s", job.id, search_job.status,
+                    extra={"articles": search_job.articles_parsed})
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from core.config import settings
+from services.rate_limiter import TokenBucket, get_rate_limiter
+from services.retry import AdaptiveThrottle, get_throttle
+
+
+@dataclass
+class EgressIdentity:
+    """One way out to Scholar: an optional proxy plus the headers sent through it.
+
+    Each identity is one egress address with its own token bucket and adaptive
+    throttle, so adding proxies adds request budget instead of sharing one IP's.
+    Its User-Agents take turns within that budget.
+    """
+    name: str
+    proxy: Optional[str]
+    headers: Dict[str, str]
+    user_agents: List[str]
+    limiter: TokenBucket
+    throttle: AdaptiveThrottle
+    latency: float = 0.0  # EWMA of response time in seconds
+    in_flight: int = 0
+    requests: int = 0
+    blocks: int = 0
+    cooldown_until: float = 0.0
+    recent: deque = field(default_factory=lambda: deque(maxlen=settings.throttle_window))
+    turn: int = 0
+
+    def next_user_agent(self) -> str:
+        user_agent = self.user_agents[self.turn % len(self.user_agents)]
+        self.turn += 1
+        return user_agent
+
+    @property
+    def block_rate(self) -> float:
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+
+    def score(self) -> float:
+        """Expected cost of sending the next request here; lower is healthier"""
+        latency = self.latency or 1.0
+        return latency * (1 + self.in_flight) / max(0.05, 1.0 - self.block_rate)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "proxy": bool(self.proxy),
+            "rate": round(self.limiter.rate, 3),
+            "latency": round(self.latency, 3),
+            "block_rate": round(self.block_rate, 3),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "blocks": self.blocks,
+            "cooling_down": self.cooldown_until > time.monotonic(),
+        }
+
+
+class EgressPool:
+    """Routes each page fetch to the healthiest identity.
+
+    Identities are scored on latency, block rate and current load. A blocked identity
+    sits out `egress_block_cooldown` seconds unless every identity is cooling down.
+    """
+
+    def __init__(self, identities: List[EgressIdentity]):
+        self.identities = identities
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.identities)
+
+    def acquire(self) -> EgressIdentity:
+        with self._lock:
+            now = time.monotonic()
+            ready = [identity for identity in self.identities if identity.cooldown_until <= now]
+            if ready:
+                identity = min(ready, key=EgressIdentity.score)
+            else:
+                identity = min(self.identities, key=lambda i: i.cooldown_until)
+            identity.in_flight += 1
+            return identity
+
+    async def release(self, identity: EgressIdentity, latency: Optional[float] = None, blocked: bool = False):
+        """Record the outcome of a request.
+
+        `latency` is None when no response arrived (a network or proxy error); that
+        counts against the identity's health but, unlike a block, does not slow it down.
+        """
+        with self._lock:
+            identity.in_flight -= 1
+            identity.requests += 1
+            identity.recent.append(blocked or latency is None)
+            if latency is not None:
+                identity.latency = latency if not identity.latency else 0.8 * identity.latency + 0.2 * latency
+            if blocked:
+                identity.blocks += 1
+                identity.cooldown_until = time.monotonic() + settings.egress_block_cooldown
+        if latency is not None:
+            await identity.throttle.record(blocked)
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            return [identity.to_dict() for identity in self.identities]
+
+
+def _build_identities() -> List[EgressIdentity]:
+    # One identity per distinct egress address; "direct" and no proxy are the same address
+    proxies = list(dict.fromkeys(None if proxy == "direct" else proxy for proxy in settings.egress_proxies)) or [None]
+    user_agents = list(settings.egress_user_agents) or [settings.user_agent]
+    identities = []
+    for i, proxy in enumerate(proxies):
+        # The first identity keeps the historical limiter name so a single-identity
+        # setup shares its budget with processes that predate the pool
+        limiter = get_rate_limiter("scholar" if i == 0 else f"scholar:{i}")
+        identities.append(EgressIdentity(
+            name=f"egress-{i}",
+            proxy=proxy,
+            headers={"Accept-Language": settings.egress_accept_language},
+            user_agents=user_agents,
+            limiter=limiter,
+            throttle=get_throttle(limiter),
+        ))
+    return identities
+
+
+_egress_pool: Optional[EgressPool] = None
+_egress_pool_lock = threading.Lock()
+
+
+def get_egress_pool() -> EgressPool:
+    """Return the process-wide egress pool built from settings"""
+    global _egress_pool
+    with _egress_pool_lock:
+        if _egress_pool is None:
+            _egress_pool = EgressPool(_build_identities())
+        return _egress_pool
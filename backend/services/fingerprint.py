@@ -0,0 +1,38 @@
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+from models.article import ArticleSchema
+
+
+def normalize_title(title: str) -> str:
+    """Casefolded, accent-free title with punctuation and repeated whitespace removed.
+
+    Works on Unicode text, so CJK, Cyrillic or Greek titles keep their letters; a title
+    made only of punctuation normalizes to "".
+    """
+    title = unicodedata.normalize("NFKD", title or "")
+    title = "".join(char for char in title if not unicodedata.combining(char))
+    return re.sub(r"[\W_]+", " ", title.casefold()).strip()
+
+
+def paper_fingerprint(title: str, year: Optional[int], url: Optional[str] = None) -> str:
+    """Identity of a paper across result pages and queries: normalized title plus year.
+
+    URLs are not used because Scholar links the same paper to different mirrors; only
+    a title that normalizes to nothing falls back to the URL, or else the raw title.
+    """
+    key = normalize_title(title) or url or (title or "").strip()
+    return f"{key}|{year or ''}"
+
+
+def article_fingerprint(article: ArticleSchema) -> str:
+    return paper_fingerprint(article.title, article.year, article.url)
+
+
+def unique_articles(articles: Iterable[ArticleSchema]) -> List[ArticleSchema]:
+    """The first occurrence of each paper, in order, as a search links them"""
+    unique = {}
+    for article in articles:
+        unique.setdefault(article_fingerprint(article), article)
+    return list(unique.values())
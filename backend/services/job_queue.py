@@ -0,0 +1,195 @@
+"""Durable crawl queue in the application database.
+
+With settings.crawl_queue_enabled the API only inserts crawl_jobs rows and reads
+results; `python worker.py` processes, on any machine that shares the database,
+claim and run them. A claim is a lease: the owner renews it (and reports progress)
+every crawl_job_heartbeat seconds, and once it lapses, because the worker died or
+hung, any worker may claim the job again. The search's page checkpoint makes the
+new owner continue where the old one stopped.
+
+Claims are conditional UPDATEs on the job's status, lease and attempt count, so
+two workers racing for the same row cannot both win, on SQLite or a server DB.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.article import BatchStatus, CrawlJobDB, SearchJobStatus, SearchRequest, ShardedSearchRequest
+from services.batch_search import BatchJob, summarize_batch
+from services.persistence import mark_search_failed
+from services.search_jobs import SearchJob
+
+logger = logging.getLogger(__name__)
+
+REQUEST_MODELS = {
+    "search": SearchRequest,
+    "sharded": ShardedSearchRequest,
+}
+
+
+def job_request(job: CrawlJobDB) -> SearchRequest:
+    return REQUEST_MODELS[job.kind](**job.request)
+
+
+def enqueue_job(db: AsyncSession, search_id: int, request: SearchRequest, kind: str = "search",
+                batch_id: Optional[str] = None) -> CrawlJobDB:
+    """Add a crawl for `search_id` to the queue; the caller commits"""
+    progress = SearchJob(search_id=search_id, request=request).to_status()
+    job = CrawlJobDB(
+        search_id=search_id, kind=kind, request=request.model_dump(), batch_id=batch_id,
+        progress=progress.model_dump(mode="json")
+    )
+    db.add(job)
+    return job
+
+
+def enqueue_batch(db: AsyncSession, batch: BatchJob):
+    """Queue a batch's keywords under its batch_id; keywords served from recent searches go in completed"""
+    now = datetime.utcnow()
+    for search_job in batch.jobs:
+        job = enqueue_job(db, search_job.search_id, search_job.request, batch_id=batch.batch_id)
+        if search_job.status == "completed":
+            job.status = "completed"
+            job.progress = search_job.to_status().model_dump(mode="json")
+            job.finished_at = now
+
+
+def _claimable(now: datetime):
+    # Never claimed, or its owner stopped renewing the lease
+    return or_(
+        CrawlJobDB.status == "queued",
+        and_(CrawlJobDB.status == "running", CrawlJobDB.lease_expires_at < now)
+    )
+
+
+async def claim_job(db: AsyncSession, worker_id: str) -> Optional[CrawlJobDB]:
+    """Lease the oldest claimable job to `worker_id`, or return None when there is none"""
+    while True:
+        now = datetime.utcnow()
+        result = await db.execute(select(CrawlJobDB).where(_claimable(now)).order_by(CrawlJobDB.id).limit(1))
+        candidate = result.scalar_one_or_none()
+        if candidate is None:
+            return None
+
+        # The attempt count doubles as a version number: a concurrent claim bumps it
+        same_claim = and_(CrawlJobDB.id == candidate.id, CrawlJobDB.attempts == candidate.attempts, _claimable(now))
+        if candidate.attempts >= settings.crawl_job_max_attempts:
+            # Every worker that took it died or hung; stop handing it out
+            gave_up = await db.execute(
+                update(CrawlJobDB).where(same_claim)
+                .values(status="failed", error="Lease expired too many times", finished_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if gave_up.rowcount == 1:
+                # Commits both updates; a failed search is not picked up again by the resume scan
+                await mark_search_failed(db, candidate.search_id)
+                logger.warning("Giving up on crawl job %d after %d attempts", candidate.id, candidate.attempts)
+            else:
+                await db.commit()
+            continue
+
+        won = await db.execute(
+            update(CrawlJobDB).where(same_claim)
+            .values(
+                status="running", lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=settings.crawl_job_lease),
+                attempts=CrawlJobDB.attempts + 1, started_at=candidate.started_at or now
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if won.rowcount == 1:
+            await db.refresh(candidate)
+            return candidate
+
+
+async def renew_lease(db: AsyncSession, job_id: int, worker_id: str, progress: SearchJobStatus) -> bool:
+    """Extend `worker_id`'s lease and store its progress; False once another worker owns the job"""
+    result = await db.execute(
+        update(CrawlJobDB)
+        .where(CrawlJobDB.id == job_id, CrawlJobDB.lease_owner == worker_id, CrawlJobDB.status == "running")
+        .values(
+            lease_expires_at=datetime.utcnow() + timedelta(seconds=settings.crawl_job_lease),
+            progress=progress.model_dump(mode="json")
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def finish_job(db: AsyncSession, job_id: int, worker_id: str, progress: SearchJobStatus):
+    """Record the final status of a job `worker_id` still owns"""
+    await db.execute(
+        update(CrawlJobDB)
+        .where(CrawlJobDB.id == job_id, CrawlJobDB.lease_owner == worker_id)
+        .values(
+            status=progress.status, progress=progress.model_dump(mode="json"), error=progress.error,
+            lease_expires_at=None, finished_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def release_job(db: AsyncSession, job_id: int, worker_id: str):
+    """Hand a job back on shutdown, without counting the attempt, so another worker resumes it now"""
+    await db.execute(
+        update(CrawlJobDB)
+        .where(CrawlJobDB.id == job_id, CrawlJobDB.lease_owner == worker_id, CrawlJobDB.status == "running")
+        .values(status="queued", lease_owner=None, lease_expires_at=None, attempts=CrawlJobDB.attempts - 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+def job_status(job: CrawlJobDB) -> SearchJobStatus:
+    """The owner's last reported progress, with the queue's own status and error"""
+    progress = dict(job.progress or {})
+    progress.update(search_id=job.search_id, keyword=job.request["keyword"], status=job.status)
+    if job.error:
+        progress["error"] = job.error
+    return SearchJobStatus(**progress)
+
+
+async def get_job_status(db: AsyncSession, search_id: int) -> Optional[SearchJobStatus]:
+    result = await db.execute(
+        select(CrawlJobDB).where(CrawlJobDB.search_id == search_id).order_by(CrawlJobDB.id.desc()).limit(1)
+    )
+    job = result.scalar_one_or_none()
+    return job_status(job) if job else None
+
+
+async def get_batch_status(db: AsyncSession, batch_id: str) -> Optional[BatchStatus]:
+    result = await db.execute(select(CrawlJobDB).where(CrawlJobDB.batch_id == batch_id).order_by(CrawlJobDB.id))
+    jobs = result.scalars().all()
+    if not jobs:
+        return None
+    started = [job.started_at for job in jobs if job.started_at]
+    finished = [job.finished_at for job in jobs if job.finished_at]
+    end = max(finished) if len(finished) == len(jobs) else datetime.utcnow()
+    return summarize_batch(
+        batch_id, [job_status(job) for job in jobs],
+        elapsed=(end - min(started)).total_seconds() if started else 0.0
+    )
+
+
+async def wait_for_job(search_id: int, timeout: float) -> Optional[SearchJobStatus]:
+    """Poll until the search's queued crawl completes or fails, or `timeout` passes; returns the last status.
+
+    None means the job is gone, e.g. because the search was deleted meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        async with AsyncSessionLocal() as db:
+            status = await get_job_status(db, search_id)
+        if status is None or status.status in ("completed", "failed") or loop.time() >= deadline:
+            return status
+        await asyncio.sleep(settings.crawl_worker_poll_interval)
@@ -1,44 +1,58 @@
-import requests
-import time
+import asyncio
+import httpx
+import logging
 import re
-from typing import List, Optional
-from bs4 import BeautifulSoup
+import time
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
 from datetime import datetime
 
 from core.config import settings
+from core.metrics import (
+    FETCH_RETRIES, PAGE_CACHE_HITS, PAGE_FETCH_SECONDS, PAGE_PARSE_SECONDS, PARSE_FAILURES, ROBOT_DETECTIONS,
+    SELENIUM_FALLBACKS
+)
 from models.article import ArticleSchema
+from services.browser_pool import get_browser_pool
+from services.egress_pool import EgressIdentity, get_egress_pool
+from services.page_cache import get_page_cache
+from services.parse_executor import parse_content
+from services.parsers import get_parser, parse_result_count
+from services.retry import BLOCK_STATUS, RETRYABLE_STATUS, backoff_delay
 
-# Selenium imports (optional)
-try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.common.by import By
-    SELENIUM_AVAILABLE = True
-except ImportError:
-    SELENIUM_AVAILABLE = False
+logger = logging.getLogger(__name__)
 
 
 class OriginalScholarSpider:
     """Based on the original working google_scholar_spider.py"""
     
     def __init__(self):
-        self.base_url = 'https://scholar.google.com/scholar?start={}&q={}&hl=en&as_sdt=0,5'
+        self.base_url = settings.google_scholar_base_url.rstrip('/') + '/scholar?start={}&q={}&hl=en&as_sdt=0,5'
         self.startyear_url = '&as_ylo={}'
         self.endyear_url = '&as_yhi={}'
         self.robot_keywords = ['unusual traffic from your computer network', 'not a robot']
-        self.session = None
-        self.driver = None
+        self.egress = get_egress_pool()
+        self.clients = {}
+        # Every egress address brings its own request budget, so pages in flight scale with the pool
+        self.max_in_flight = max(1, settings.max_concurrent_requests) * len(self.egress)
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.parser_name = get_parser().name
+        self.rate_limit_wait = 0.0
+        self.page_outcomes = {}
         
     async def __aenter__(self):
-        # Create a requests session
-        self.session = requests.Session()
+        # One async HTTP client per egress identity (proxy), so page fetches never block the event loop
+        for identity in self.egress.identities:
+            self.clients[identity.name] = httpx.AsyncClient(
+                follow_redirects=True, timeout=settings.timeout,
+                proxy=identity.proxy, headers=identity.headers
+            )
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            self.session.close()
-        if self.driver:
-            self.driver.quit()
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients = {}
     
     def _create_main_url(self, start_year: Optional[int] = None, end_year: Optional[int] = None) -> str:
         """Create main URL based on year filters"""
@@ -52,256 +66,301 @@ class OriginalScholarSpider:
             
         return gscholar_main_url
     
-    def _get_citations(self, content: str) -> int:
-        """Extract citation count from content"""
-        citation_start = content.find('Cited by ')
-        if citation_start == -1:
-            return 0
-        citation_end = content.find('<', citation_start)
-        try:
-            return int(content[citation_start + 9:citation_end])
-        except:
-            return 0
-    
-    def _get_year(self, content: str) -> int:
-        """Extract year from content"""
-        try:
-            for char in range(len(content)):
-                if content[char] == '-':
-                    out = content[char - 5:char - 1]
-                    if out.isdigit():
-                        return int(out)
-        except:
-            pass
-        return 0
+    def _adopt_cookies(self, identity: EgressIdentity, cookies):
+        """Copy browser session cookies into an identity's HTTP client so later pages skip the browser"""
+        client = self.clients[identity.name]
+        for cookie in cookies:
+            client.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain', ''), path=cookie.get('path', '/')
+            )
     
-    def _get_author(self, content: str) -> str:
-        """Extract author from content"""
-        try:
-            author_end = content.find('-')
-            return content[2:author_end - 1] if author_end > 2 else content
-        except:
-            return "Author not found"
+    def _is_robot_page(self, content: bytes) -> bool:
+        content_str = content.decode('ISO-8859-1', errors='ignore')
+        return any(kw in content_str for kw in self.robot_keywords)
     
-    def _setup_driver(self):
-        """Setup Chrome driver like the original code"""
-        if not SELENIUM_AVAILABLE:
-            print("❌ Selenium not available")
-            return None
-            
-        try:
-            chrome_options = Options()
-            chrome_options.add_argument("--disable-infobars")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            # Don't use headless mode for CAPTCHA solving
-            driver = webdriver.Chrome(options=chrome_options)
-            return driver
-        except Exception as e:
-            print(f"❌ Failed to setup Chrome driver: {e}")
-            return None
-    
-    def _get_element(self, driver, xpath, attempts=5, count=0):
-        """Safe get_element method with multiple attempts (from original code)"""
-        try:
-            element = driver.find_element(By.XPATH, xpath)
-            return element
-        except Exception as e:
-            if count < attempts:
-                time.sleep(1)
-                return self._get_element(driver, xpath, attempts=attempts, count=count + 1)
-            else:
-                print("Element not found")
-                return None
+    async def _request(self, identity: EgressIdentity, url: str):
+        """One GET through `identity`, paced by its rate limiter and holding a concurrency slot.
+        
+        Returns the response and its latency, excluding time spent waiting for the limiter.
+        """
+        async with self._semaphore:
+            waited = await identity.limiter.acquire()
+            self.rate_limit_wait += waited
+            if waited > 0:
+                logger.debug("Rate limiter held request for %.2fs", waited, extra={"egress": identity.name, "url": url})
+            started = time.perf_counter()
+            page = await self.clients[identity.name].get(url, headers={"User-Agent": identity.next_user_agent()})
+            return page, time.perf_counter() - started
     
-    def _get_content_with_selenium(self, url):
-        """Get content with Selenium (adapted from original code)"""
-        if not SELENIUM_AVAILABLE:
-            return None
-            
-        try:
-            if not self.driver:
-                self.driver = self._setup_driver()
-                
-            if not self.driver:
-                return None
+    async def _fetch_page(self, n: int, url: str, use_cache: bool = True) -> Optional[bytes]:
+        """Fetch a single result page with retries, falling back to Selenium on persistent robot checks.
+        
+        429/5xx responses, robot pages and network errors are retried up to settings.max_retries
+        times with exponential backoff and jitter, each attempt through the healthiest egress identity;
+        blocks (429/503 or a robot page) also slow down and cool off the identity that was blocked.
+        The final outcome is recorded in self.page_outcomes.
+        """
+        outcome = {"start": n, "outcome": "ok", "status": None, "attempts": 0, "backoff": 0.0}
+        self.page_outcomes[url] = outcome
+        
+        cache = get_page_cache() if use_cache else None
+        if cache:
+            content = await cache.get(url)
+            if content is not None:
+                logger.debug("Page cache hit", extra={"url": url})
+                PAGE_CACHE_HITS.inc()
+                outcome["outcome"] = "cached"
+                return content
+        
+        content = None
+        identity = None
+        for attempt in range(settings.max_retries + 1):
+            if attempt:
+                delay = backoff_delay(attempt - 1)
+                outcome["backoff"] = round(outcome["backoff"] + delay, 3)
+                FETCH_RETRIES.inc(reason=outcome["outcome"])
+                logger.info("Retrying page %d in %.1fs (attempt %d)", n//10 + 1, delay, attempt + 1,
+                            extra={"reason": outcome["outcome"]})
+                await asyncio.sleep(delay)
+            outcome["attempts"] = attempt + 1
             
-            print(f"🌐 Opening URL with Selenium: {url}")
-            self.driver.get(url)
+            # Each attempt goes out through whichever identity is healthiest right now
+            identity = self.egress.acquire()
+            outcome["egress"] = identity.name
+            try:
+                page, latency = await self._request(identity, url)
+            except httpx.HTTPError as e:
+                await self.egress.release(identity)
+                logger.warning("Error fetching page %d: %r", n//10 + 1, e, extra={"egress": identity.name})
+                outcome.update(outcome="error", status=None)
+                continue
+            except BaseException:
+                await self.egress.release(identity)
+                raise
             
-            el = self._get_element(self.driver, "/html/body")
-            if not el:
-                return None
-                
-            content = el.get_attribute('innerHTML')
+            content = page.content
+            outcome["status"] = page.status_code
+            blocked = page.status_code in BLOCK_STATUS or self._is_robot_page(content)
+            await self.egress.release(identity, latency, blocked)
             
-            if any(kw in content for kw in self.robot_keywords):
-                print("🚨 CAPTCHA detected! Please solve manually...")
-                print("The browser window should be open. Solve the CAPTCHA and the search will continue automatically.")
-                
-                # Wait for user to solve CAPTCHA
-                # In a production environment, you might implement a more sophisticated solution
-                time.sleep(30)  # Give user time to solve CAPTCHA
-                
-                # Get content again after CAPTCHA solving
-                self.driver.get(url)
-                el = self._get_element(self.driver, "/html/body")
-                if el:
-                    content = el.get_attribute('innerHTML')
+            if page.status_code in RETRYABLE_STATUS:
+                logger.warning("Scholar answered %d for page %d", page.status_code, n//10 + 1,
+                               extra={"egress": identity.name})
+                outcome["outcome"] = "http_error"
+                continue
             
-            return content.encode('utf-8')
+            # Check for robot detection
+            if blocked:
+                ROBOT_DETECTIONS.inc()
+                logger.warning("Robot check on page %d", n//10 + 1, extra={"egress": identity.name})
+                outcome["outcome"] = "robot"
+                continue
             
-        except Exception as e:
-            print(f"❌ Selenium error: {e}")
+            outcome["outcome"] = "ok" if page.status_code == 200 else "http_error"
+            break
+        
+        if outcome["outcome"] == "robot":
+            browser = get_browser_pool()
+            if not browser:
+                SELENIUM_FALLBACKS.inc(result="unavailable")
+                logger.warning("Robot check persisted and the Selenium fallback is unavailable", extra={"url": url})
+                return None
+            logger.info("Robot check persisted, trying Selenium", extra={"url": url})
+            result = await browser.fetch(url, self.robot_keywords)
+            if not result:
+                SELENIUM_FALLBACKS.inc(result="failure")
+                logger.warning("Selenium fallback failed", extra={"url": url})
+                return None
+            SELENIUM_FALLBACKS.inc(result="success")
+            content = result.content
+            outcome["outcome"] = "browser"
+            self._adopt_cookies(identity, result.cookies)
+        elif outcome["outcome"] != "ok":
             return None
+        
+        # Only cache real result pages, never robot checks or error responses
+        if get_page_cache() and not self._is_robot_page(content):
+            await get_page_cache().set(url, content)
+        
+        return content
     
-    def _parse_gs_or_div(self, div) -> Optional[ArticleSchema]:
-        """Parse a single gs_or div element to extract article data"""
+    async def _fetch_page_safe(self, n: int, url: str, use_cache: bool = True) -> Optional[bytes]:
+        """Fetch a page, logging and swallowing errors so one bad page doesn't abort the crawl"""
+        logger.debug("Fetching page %d", n//10 + 1, extra={"url": url})
+        started = time.perf_counter()
         try:
-            # Title and link
-            title_elem = div.find('h3')
-            if not title_elem:
-                return None
-                
-            title_link = title_elem.find('a')
-            if title_link:
-                title = title_link.text.strip()
-                url = title_link.get('href', '')
-            else:
-                title = title_elem.text.strip()
-                url = None
-            
-            # Citations
-            citations = self._get_citations(str(div))
-            
-            # Author info from gs_a div
-            gs_a_div = div.find('div', {'class': 'gs_a'})
-            if gs_a_div:
-                gs_a_text = gs_a_div.text
-                
-                # Year
-                year = self._get_year(gs_a_text)
-                
-                # Author
-                author = self._get_author(gs_a_text)
-                
-                # Publisher and venue
-                try:
-                    parts = gs_a_text.split("-")
-                    publisher = parts[-1].strip() if len(parts) > 1 else "Publisher not found"
-                    
-                    if len(parts) > 2:
-                        venue_part = parts[-2]
-                        venue = " ".join(venue_part.split(",")[:-1]).strip()
-                    else:
-                        venue = "Venue not found"
-                except:
-                    publisher = "Publisher not found"
-                    venue = "Venue not found"
-            else:
-                year = 0
-                author = "Author not found"
-                publisher = "Publisher not found"
-                venue = "Venue not found"
-            
-            # Description from gs_rs div
-            description = None
-            gs_rs_div = div.find('div', {'class': 'gs_rs'})
-            if gs_rs_div:
-                description = gs_rs_div.text.strip()
-            
-            # Calculate citations per year
-            citations_per_year = 0.0
-            if year > 0 and citations > 0:
-                years_passed = max(1, datetime.now().year - year)
-                citations_per_year = round(citations / years_passed, 2)
-            
-            return ArticleSchema(
-                title=title,
-                authors=author,
-                venue=venue,
-                publisher=publisher,
-                year=year if year > 0 else None,
-                citations=citations,
-                citations_per_year=citations_per_year,
-                description=description,
-                url=url
-            )
-            
+            content = await self._fetch_page(n, url, use_cache)
         except Exception as e:
-            print(f"Error parsing article: {e}")
+            logger.exception("Error fetching page %d: %s", n//10 + 1, e)
+            self.page_outcomes[url] = {**self.page_outcomes.get(url, {"start": n, "attempts": 0, "backoff": 0.0}),
+                                     "outcome": "error", "status": None}
+            content = None
+        PAGE_FETCH_SECONDS.observe(time.perf_counter() - started, outcome=self.page_outcomes[url]["outcome"])
+        return content
+    
+    def _query_outcomes(self, keyword: str, start_year: Optional[int], end_year: Optional[int]) -> List[str]:
+        """URLs of the recorded outcomes that belong to one query: keyword and year filters, any start="""
+        gscholar_main_url = self._create_main_url(start_year, end_year)
+        query = keyword.replace(' ', '+')
+        return [url for url, outcome in self.page_outcomes.items()
+                if url == gscholar_main_url.format(str(outcome["start"]), query)]
+    
+    def page_outcome_list(self, keyword: Optional[str] = None, start_year: Optional[int] = None,
+                          end_year: Optional[int] = None) -> List[dict]:
+        """Per-page fetch outcomes in start= order, only one query's when the spider is shared"""
+        if keyword is None:
+            outcomes = list(self.page_outcomes.values())
+        else:
+            outcomes = [self.page_outcomes[url] for url in self._query_outcomes(keyword, start_year, end_year)]
+        return sorted(outcomes, key=lambda outcome: outcome["start"])
+    
+    def forget_page_outcomes(self, keyword: str, start_year: Optional[int] = None, end_year: Optional[int] = None):
+        """Drop a finished query's outcomes, so a long-lived shared spider does not accumulate them"""
+        for url in self._query_outcomes(keyword, start_year, end_year):
+            del self.page_outcomes[url]
+    
+    async def _iter_pages(self, gscholar_main_url: str, keyword: str, starts: Iterable[int],
+                          use_cache: bool = True):
+        """Fetch the result pages at `starts` concurrently and yield (start, content) in that order.
+        
+        At most settings.max_concurrent_requests pages per egress identity are in flight. When the caller
+        stops iterating (e.g. on the first empty page) the outstanding fetches are cancelled.
+        """
+        starts = iter(starts)
+        query = keyword.replace(' ', '+')
+        pending = deque()
+        
+        def schedule_next():
+            n = next(starts, None)
+            if n is not None:
+                url = gscholar_main_url.format(str(n), query)
+                pending.append((n, asyncio.create_task(self._fetch_page_safe(n, url, use_cache))))
+        
+        try:
+            for _ in range(self.max_in_flight):
+                schedule_next()
+            while pending:
+                n, task = pending.popleft()
+                content = await task
+                schedule_next()
+                yield n, content
+        finally:
+            for _, task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+    
+    async def _parse_page(self, n: int, content: bytes) -> Optional[List[ArticleSchema]]:
+        """Articles on a fetched page, or None when it has no result divs (blocked or past the end)"""
+        # One entry per gs_or result div (None where the div could not be parsed),
+        # parsed in the process pool when one is configured
+        with PAGE_PARSE_SECONDS.time(parser=self.parser_name):
+            mydivs = await parse_content(content, self.parser_name)
+        logger.debug("Found %d article divs on page %d", len(mydivs), n//10 + 1)
+        
+        if not mydivs:
+            logger.warning("No articles found on page %d, might be blocked or end of results", n//10 + 1)
             return None
+        PARSE_FAILURES.inc(sum(1 for fields in mydivs if fields is None))
+        
+        # Parse each article
+        page_articles = []
+        for fields in mydivs:
+            if fields and fields['title'] and fields['title'] != 'Could not catch title':
+                article = ArticleSchema(**fields)
+                page_articles.append(article)
+                logger.debug("Parsed: %s... (%d citations)", article.title[:60], article.citations)
+        
+        logger.info("Parsed %d articles from page %d", len(page_articles), n//10 + 1)
+        return page_articles
     
-    async def search(self, keyword: str, num_results: int = 50, 
-                    start_year: Optional[int] = None, 
-                    end_year: Optional[int] = None) -> List[ArticleSchema]:
-        """Search Google Scholar using the original working method"""
+    async def probe(self, keyword: str, start_year: Optional[int] = None, end_year: Optional[int] = None,
+                    use_cache: bool = True) -> Tuple[Optional[int], Optional[List[ArticleSchema]]]:
+        """Fetch a query's first result page: Scholar's estimated hit count (None if absent) and its articles.
+
+        The articles are None when the page could not be fetched.
+        """
+        url = self._create_main_url(start_year, end_year).format('0', keyword.replace(' ', '+'))
+        content = await self._fetch_page_safe(0, url, use_cache)
+        if content is None:
+            return None, None
+        return parse_result_count(content), await self._parse_page(0, content) or []
+    
+    async def iter_pages(self, keyword: str, starts: Iterable[int],
+                         start_year: Optional[int] = None,
+                         end_year: Optional[int] = None,
+                         use_cache: bool = True):
+        """Yield (start, articles) for just the result pages at `starts`, in that order.
         
-        articles = []
+        Unlike iter_search nothing ends the crawl early: a page without results yields an
+        empty list and one that could not be fetched yields None, for the caller to tell apart.
+        """
+        pages = self._iter_pages(self._create_main_url(start_year, end_year), keyword, starts, use_cache)
+        try:
+            async for n, content in pages:
+                if content is None:
+                    yield n, None
+                    continue
+                yield n, await self._parse_page(n, content) or []
+        finally:
+            await pages.aclose()
+    
+    async def iter_search(self, keyword: str, num_results: int = 50,
+                          start_year: Optional[int] = None,
+                          end_year: Optional[int] = None,
+                          use_cache: bool = True,
+                          scheduler=None,
+                          start_offset: int = 0):
+        """Yield (start, articles) for each result page, in start= order, as soon as it is parsed.
+        
+        Pages that could not be fetched yield an empty list so callers can still track progress.
+        With a CrawlScheduler the pages are queued behind other searches' instead of fetched directly.
+        A resumed crawl passes its checkpoint's next start= as start_offset; the results before it
+        count towards num_results.
+        """
+        parsed = start_offset
         gscholar_main_url = self._create_main_url(start_year, end_year)
         
-        print(f"🔍 Searching Google Scholar for '{keyword}' (target: {num_results} results)")
-        print(f"🌐 Using URL pattern: {gscholar_main_url}")
+        logger.info("Searching Google Scholar for '%s' (target: %d results)", keyword, num_results,
+                    extra={"url_pattern": gscholar_main_url})
         
-        # Get content from URLs in batches of 10
-        for n in range(0, num_results, 10):
-            url = gscholar_main_url.format(str(n), keyword.replace(' ', '+'))
-            print(f"📖 Fetching page {n//10 + 1}, URL: {url}")
-            
-            try:
-                # Make request
-                page = self.session.get(url)
-                content = page.content
-                
-                # Check for robot detection
-                content_str = content.decode('ISO-8859-1', errors='ignore')
-                if any(kw in content_str for kw in self.robot_keywords):
-                    print("🤖 Robot checking detected, trying Selenium...")
-                    # Use Selenium fallback like the original code
-                    try:
-                        content = self._get_content_with_selenium(url)
-                        if not content:
-                            print("❌ Selenium fallback failed")
-                            continue
-                    except Exception as e:
-                        print(f"❌ Selenium error: {e}")
-                        continue
-                
-                # Parse with BeautifulSoup
-                soup = BeautifulSoup(content, 'html.parser', from_encoding='utf-8')
-                
-                # Find articles using the original selector
-                mydivs = soup.findAll("div", {"class": "gs_or"})
-                print(f"📄 Found {len(mydivs)} article divs on this page")
+        # Pages are fetched concurrently but consumed in start= order
+        starts = range(start_offset, num_results, settings.results_per_page)
+        fetch_pages = scheduler.iter_pages if scheduler else self._iter_pages
+        pages = fetch_pages(gscholar_main_url, keyword, starts, use_cache)
+        try:
+            async for n, content in pages:
+                if content is None:
+                    yield n, []
+                    continue
                 
-                if not mydivs:
-                    print("⚠️  No articles found, might be blocked or end of results")
+                page_articles = await self._parse_page(n, content)
+                if page_articles is None:
                     break
                 
-                # Parse each article
-                page_articles = 0
-                for div in mydivs:
-                    if len(articles) >= num_results:
-                        break
-                        
-                    article = self._parse_gs_or_div(div)
-                    if article and article.title and article.title != 'Could not catch title':
-                        articles.append(article)
-                        page_articles += 1
-                        print(f"✅ Parsed: {article.title[:60]}... ({article.citations} citations)")
+                page_articles = page_articles[:num_results - parsed]
+                parsed += len(page_articles)
+                yield n, page_articles
                 
-                print(f"📊 Successfully parsed {page_articles} articles from this page")
-                
-                if len(articles) >= num_results:
+                if parsed >= num_results:
                     break
-                
-                # Original delay
-                print("⏳ Waiting 0.5s before next request...")
-                time.sleep(0.5)
-                
-            except Exception as e:
-                print(f"❌ Error fetching page {n//10 + 1}: {e}")
-                continue
+        finally:
+            await pages.aclose()
+    
+    async def search(self, keyword: str, num_results: int = 50, 
+                    start_year: Optional[int] = None, 
+                    end_year: Optional[int] = None,
+                    use_cache: bool = True) -> List[ArticleSchema]:
+        """Search Google Scholar using the original working method"""
+        
+        articles = []
+        pages = self.iter_search(keyword, num_results, start_year, end_year, use_cache)
+        try:
+            async for _, page_articles in pages:
+                articles.extend(page_articles)
+        finally:
+            await pages.aclose()
         
-        print(f"🎉 Search completed: {len(articles)} articles found")
-        return articles
\ No newline at end of file
+        logger.info("Search completed: %d articles found", len(articles), extra={"keyword": keyword})
+        return articles
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from core.config import settings
+
+
+class PageCache:
+    """On-disk cache of raw Scholar result pages keyed by full URL.
+
+    Entries expire after `ttl` seconds and the total stored size is capped at
+    `max_bytes`, evicting the least recently used pages first.
+    """
+
+    def __init__(self, path: str, ttl: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=settings.timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, content BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_accessed_at ON pages (accessed_at)")
+        self._conn.commit()
+
+    def _get(self, url: str) -> Optional[bytes]:
+        with self._lock:
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT content, created_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+            return row[0]
+
+    def _set(self, url: str, content: bytes):
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, content, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (url, content, len(content), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired pages, then least recently used ones until under the size cap"""
+        self._conn.execute("DELETE FROM pages WHERE created_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._conn.execute("SELECT url, size FROM pages ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    async def get(self, url: str) -> Optional[bytes]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._get, url)
+
+    async def set(self, url: str, content: bytes):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._set, url, content)
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Return the process-wide page cache, or None when caching is disabled"""
+    global _page_cache
+    if not settings.page_cache_enabled:
+        return None
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache(
+                settings.page_cache_path, settings.page_cache_ttl, settings.page_cache_max_bytes
+            )
+        return _page_cache
@@ -0,0 +1,41 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from core.config import settings
+from services.parsers import get_parser
+
+
+def parse_page(content: bytes, parser_name: str) -> List[Optional[Dict]]:
+    """Parse raw page bytes into plain article dicts; runs inside pool worker processes"""
+    return get_parser(parser_name).parse(content)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_executor() -> Optional[ProcessPoolExecutor]:
+    """Return the shared parse process pool, or None when settings.parse_workers is 0"""
+    global _executor
+    if settings.parse_workers <= 0:
+        return None
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.parse_workers)
+    return _executor
+
+
+async def parse_content(content: bytes, parser_name: Optional[str] = None) -> List[Optional[Dict]]:
+    """Parse a result page off the event loop when a process pool is configured"""
+    parser_name = parser_name or get_parser().name
+    executor = get_parse_executor()
+    if executor is None:
+        return parse_page(content, parser_name)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, parse_page, content, parser_name)
+
+
+def shutdown_parse_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
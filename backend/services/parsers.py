@@ -0,0 +1,248 @@
+"""Scholar result page parsers.
+
+Every backend turns raw page bytes into one entry per ``gs_or`` result div: a plain
+dict of ArticleSchema fields, or None when the div could not be parsed. The
+BeautifulSoup backend is the original implementation and always available; the lxml
+backend extracts the same fields in a single tree walk and is used when installed.
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# lxml is optional: fall back to BeautifulSoup's html.parser without it
+try:
+    import lxml.etree
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+def get_citations(content: str) -> int:
+    """Extract citation count from content"""
+    citation_start = content.find('Cited by ')
+    if citation_start == -1:
+        return 0
+    citation_end = content.find('<', citation_start)
+    try:
+        return int(content[citation_start + 9:citation_end])
+    except:
+        return 0
+
+
+def get_year(content: str) -> int:
+    """Extract year from content"""
+    try:
+        for char in range(len(content)):
+            if content[char] == '-':
+                out = content[char - 5:char - 1]
+                if out.isdigit():
+                    return int(out)
+    except:
+        pass
+    return 0
+
+
+def get_author(content: str) -> str:
+    """Extract author from content"""
+    try:
+        author_end = content.find('-')
+        return content[2:author_end - 1] if author_end > 2 else content
+    except:
+        return "Author not found"
+
+
+# "About 4,180,000 results", "Page 2 of about 1,234 results", "3 results" in the gs_ab_md header
+_RESULT_COUNT_RE = re.compile(rb'id="gs_ab_md".{0,300}?(\d[\d,.\xa0 ]*)\s+results?\b', re.S)
+
+
+def parse_result_count(content: bytes) -> Optional[int]:
+    """Scholar's estimated total hits for the query, or None when the page has no header"""
+    match = _RESULT_COUNT_RE.search(content)
+    if not match:
+        return None
+    digits = re.sub(rb"\D", b"", match.group(1))
+    return int(digits) if digits else None
+
+
+def build_article(title: str, url: Optional[str], citations: int,
+                  gs_a_text: Optional[str], description: Optional[str]) -> Dict:
+    """Derive the remaining ArticleSchema fields from the raw pieces of a result div"""
+    if gs_a_text is not None:
+        # Year
+        year = get_year(gs_a_text)
+
+        # Author
+        author = get_author(gs_a_text)
+
+        # Publisher and venue
+        try:
+            parts = gs_a_text.split("-")
+            publisher = parts[-1].strip() if len(parts) > 1 else "Publisher not found"
+
+            if len(parts) > 2:
+                venue_part = parts[-2]
+                venue = " ".join(venue_part.split(",")[:-1]).strip()
+            else:
+                venue = "Venue not found"
+        except:
+            publisher = "Publisher not found"
+            venue = "Venue not found"
+    else:
+        year = 0
+        author = "Author not found"
+        publisher = "Publisher not found"
+        venue = "Venue not found"
+
+    # Calculate citations per year
+    citations_per_year = 0.0
+    if year > 0 and citations > 0:
+        years_passed = max(1, datetime.now().year - year)
+        citations_per_year = round(citations / years_passed, 2)
+
+    return dict(
+        title=title,
+        authors=author,
+        venue=venue,
+        publisher=publisher,
+        year=year if year > 0 else None,
+        citations=citations,
+        citations_per_year=citations_per_year,
+        description=description,
+        url=url
+    )
+
+
+class BeautifulSoupParser:
+    """The original parser: BeautifulSoup with the stdlib html.parser"""
+    name = "html.parser"
+
+    def parse_div(self, div) -> Optional[Dict]:
+        """Parse a single gs_or div element to extract article data"""
+        try:
+            # Title and link
+            title_elem = div.find('h3')
+            if not title_elem:
+                return None
+
+            title_link = title_elem.find('a')
+            if title_link:
+                title = title_link.text.strip()
+                url = title_link.get('href', '')
+            else:
+                title = title_elem.text.strip()
+                url = None
+
+            # Citations
+            citations = get_citations(str(div))
+
+            # Author info from gs_a div
+            gs_a_div = div.find('div', {'class': 'gs_a'})
+            gs_a_text = gs_a_div.text if gs_a_div else None
+
+            # Description from gs_rs div
+            description = None
+            gs_rs_div = div.find('div', {'class': 'gs_rs'})
+            if gs_rs_div:
+                description = gs_rs_div.text.strip()
+
+            return build_article(title, url, citations, gs_a_text, description)
+
+        except Exception as e:
+            logger.warning("Error parsing article: %s", e)
+            return None
+
+    def parse(self, content: bytes) -> List[Optional[Dict]]:
+        # Imported lazily: with lxml installed this backend is only a fallback
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(content, 'html.parser', from_encoding='utf-8')
+        return [self.parse_div(div) for div in soup.findAll("div", {"class": "gs_or"})]
+
+
+def _class_xpath(tag: str, cls: str) -> str:
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+
+
+class LxmlParser:
+    """lxml backend: one parse per page, fields read straight from the tree.
+
+    Citation counts come from the div's text nodes instead of re-serializing the
+    div to a string, which is what dominates the BeautifulSoup backend's cost.
+    """
+    name = "lxml"
+
+    def __init__(self):
+        self._html_parser = lxml.html.HTMLParser(encoding='utf-8')
+        self._result_xpath = lxml.etree.XPath(_class_xpath("div", "gs_or"))
+        self._gs_a_xpath = lxml.etree.XPath(_class_xpath("div", "gs_a"))
+        self._gs_rs_xpath = lxml.etree.XPath(_class_xpath("div", "gs_rs"))
+
+    def parse_div(self, div) -> Optional[Dict]:
+        try:
+            title_elem = next(div.iter('h3'), None)
+            if title_elem is None:
+                return None
+
+            title_link = next(title_elem.iter('a'), None)
+            if title_link is not None:
+                title = title_link.text_content().strip()
+                url = title_link.get('href', '')
+            else:
+                title = title_elem.text_content().strip()
+                url = None
+
+            citations = 0
+            for text in div.itertext():
+                citation_start = text.find('Cited by ')
+                if citation_start != -1:
+                    try:
+                        citations = int(text[citation_start + 9:])
+                    except ValueError:
+                        citations = 0
+                    break
+
+            gs_a_divs = self._gs_a_xpath(div)
+            gs_a_text = gs_a_divs[0].text_content() if gs_a_divs else None
+
+            gs_rs_divs = self._gs_rs_xpath(div)
+            description = gs_rs_divs[0].text_content().strip() if gs_rs_divs else None
+
+            return build_article(title, url, citations, gs_a_text, description)
+
+        except Exception as e:
+            logger.warning("Error parsing article: %s", e)
+            return None
+
+    def parse(self, content: bytes) -> List[Optional[Dict]]:
+        if not content or not content.strip():
+            return []
+        root = lxml.html.fromstring(content, parser=self._html_parser)
+        return [self.parse_div(div) for div in self._result_xpath(root)]
+
+
+PARSERS = {
+    BeautifulSoupParser.name: BeautifulSoupParser,
+    LxmlParser.name: LxmlParser,
+}
+
+_parser_instances: Dict[str, object] = {}
+
+
+def get_parser(name: Optional[str] = None):
+    """Return the parser backend `name` (default settings.html_parser; "auto" prefers lxml)"""
+    name = name or settings.html_parser
+    if name == "auto":
+        name = LxmlParser.name if LXML_AVAILABLE else BeautifulSoupParser.name
+    if name == LxmlParser.name and not LXML_AVAILABLE:
+        logger.warning("lxml not installed, falling back to html.parser")
+        name = BeautifulSoupParser.name
+    if name not in PARSERS:
+        raise ValueError(f"Unknown HTML parser backend: {name}")
+    if name not in _parser_instances:
+        _parser_instances[name] = PARSERS[name]()
+    return _parser_instances[name]
@@ -0,0 +1,392 @@
+import asyncio
+import base64
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import Select, and_, delete, exists, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.metrics import ARTICLES_STORED, DB_INSERT_SECONDS
+from models.article import (
+    ArticleDB, ArticleSchema, CitationHistoryDB, SearchArticleDB, SearchDB, SearchRequest, SearchSummary
+)
+from services.fingerprint import article_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# INSERT ... ON CONFLICT for the canonical article upsert, by database dialect
+DIALECT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def article_row(article: ArticleSchema, fingerprint: str, created_at: datetime) -> Dict:
+    return dict(
+        fingerprint=fingerprint,
+        title=article.title,
+        authors=article.authors,
+        venue=article.venue,
+        publisher=article.publisher,
+        year=article.year,
+        citations=article.citations,
+        citations_per_year=article.citations_per_year,
+        description=article.description,
+        url=article.url,
+        created_at=created_at
+    )
+
+
+async def record_citation_changes(db: AsyncSession, changed: List[Tuple[Any, int]], now: datetime):
+    """Append (article row, new count) pairs to citation_history; the caller commits.
+
+    The first recorded change of an article also records the value it changed from.
+    Rows need id, citations, created_at and refreshed_at.
+    """
+    if not changed:
+        return
+    result = await db.execute(
+        select(CitationHistoryDB.article_id)
+        .where(CitationHistoryDB.article_id.in_([row.id for row, _ in changed]))
+        .distinct()
+    )
+    has_history = set(result.scalars())
+    history = []
+    for row, citations in changed:
+        if row.id not in has_history:
+            history.append({
+                "article_id": row.id, "citations": row.citations,
+                "recorded_at": row.refreshed_at or row.created_at
+            })
+        history.append({"article_id": row.id, "citations": citations, "recorded_at": now})
+    await db.execute(insert(CitationHistoryDB), history)
+
+
+async def _store_chunk(db: AsyncSession, search_id: int, ranked_articles: List[Tuple[int, ArticleSchema]],
+                       now: datetime):
+    # A paper listed twice (e.g. under two mirrors) keeps its first rank
+    by_fingerprint: Dict[str, Tuple[int, ArticleSchema]] = {}
+    for rank, article in ranked_articles:
+        by_fingerprint.setdefault(article_fingerprint(article), (rank, article))
+    fingerprints = list(by_fingerprint)
+
+    result = await db.execute(
+        select(ArticleDB.id, ArticleDB.fingerprint, ArticleDB.citations, ArticleDB.created_at, ArticleDB.refreshed_at)
+        .where(ArticleDB.fingerprint.in_(fingerprints))
+    )
+    known = {row.fingerprint: row for row in result}
+
+    # Papers already stored by another search only get their citation count brought up to date
+    upsert = DIALECT_INSERTS[db.bind.dialect.name](ArticleDB)
+    await db.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[ArticleDB.fingerprint],
+            set_={
+                "citations": upsert.excluded.citations,
+                "citations_per_year": upsert.excluded.citations_per_year,
+                "refreshed_at": upsert.excluded.created_at,
+            }
+        ),
+        [article_row(article, fingerprint, now) for fingerprint, (_, article) in by_fingerprint.items()]
+    )
+    result = await db.execute(
+        select(ArticleDB.fingerprint, ArticleDB.id).where(ArticleDB.fingerprint.in_(fingerprints))
+    )
+    article_ids = dict(result.all())
+
+    link = DIALECT_INSERTS[db.bind.dialect.name](SearchArticleDB)
+    await db.execute(
+        link.on_conflict_do_nothing(),
+        [
+            {"search_id": search_id, "article_id": article_ids[fingerprint], "rank": rank}
+            for fingerprint, (rank, _) in by_fingerprint.items()
+        ]
+    )
+
+    changed = [
+        (row, by_fingerprint[fingerprint][1].citations) for fingerprint, row in known.items()
+        if row.citations != by_fingerprint[fingerprint][1].citations
+    ]
+    await record_citation_changes(db, changed, now)
+    ARTICLES_STORED.inc(len(known), result="reused")
+    ARTICLES_STORED.inc(len(fingerprints) - len(known), result="new")
+
+
+async def bulk_insert_articles(db: AsyncSession, search_id: int,
+                               ranked_articles: Iterable[Tuple[int, ArticleSchema]]) -> float:
+    """Store (rank, article) pairs for a search in batches of settings.bulk_insert_chunk_size.
+
+    Each paper is kept once, keyed by its fingerprint: a paper another search already
+    stored is reused, with its citation count updated in place, and the search only
+    adds a (search, article, rank) link. Bypasses the ORM unit of work; the caller
+    commits. Returns the insert time in milliseconds.
+    """
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    chunk: List[Tuple[int, ArticleSchema]] = []
+    for ranked_article in ranked_articles:
+        chunk.append(ranked_article)
+        if len(chunk) >= settings.bulk_insert_chunk_size:
+            await _store_chunk(db, search_id, chunk, now)
+            chunk = []
+    if chunk:
+        await _store_chunk(db, search_id, chunk, now)
+    elapsed = time.perf_counter() - started
+    DB_INSERT_SECONDS.observe(elapsed)
+    return elapsed * 1000
+
+
+async def count_search_articles(db: AsyncSession, search_id: int) -> int:
+    result = await db.execute(
+        select(func.count(SearchArticleDB.article_id)).where(SearchArticleDB.search_id == search_id)
+    )
+    return result.scalar_one()
+
+
+def ranked_articles(search_id: int, after_rank: int = 0) -> Select:
+    """(ArticleDB, rank) rows of a search in Scholar's relevance order, past `after_rank`"""
+    return (
+        select(ArticleDB, SearchArticleDB.rank)
+        .join(SearchArticleDB, SearchArticleDB.article_id == ArticleDB.id)
+        .where(SearchArticleDB.search_id == search_id, SearchArticleDB.rank > after_rank)
+        .order_by(SearchArticleDB.rank, ArticleDB.id)
+    )
+
+
+def linked_articles(search_ids: List[int], *columns) -> Select:
+    """`columns` (default: ArticleDB) of the given searches' articles, search by search in rank order.
+
+    An article found by several of the searches comes once per search.
+    """
+    return (
+        select(*(columns or (ArticleDB,)))
+        .join(SearchArticleDB, SearchArticleDB.article_id == ArticleDB.id)
+        .where(SearchArticleDB.search_id.in_(search_ids))
+        .order_by(SearchArticleDB.search_id, SearchArticleDB.rank, ArticleDB.id)
+    )
+
+
+async def delete_search_articles(db: AsyncSession, search_id: int):
+    """Unlink a search's articles and delete those no other search still links; the caller commits"""
+    result = await db.execute(select(SearchArticleDB.article_id).where(SearchArticleDB.search_id == search_id))
+    article_ids = list(result.scalars())
+    await db.execute(delete(SearchArticleDB).where(SearchArticleDB.search_id == search_id))
+    for offset in range(0, len(article_ids), settings.bulk_insert_chunk_size):
+        chunk = article_ids[offset:offset + settings.bulk_insert_chunk_size]
+        result = await db.execute(
+            select(ArticleDB.id)
+            .where(ArticleDB.id.in_(chunk), ~exists().where(SearchArticleDB.article_id == ArticleDB.id))
+        )
+        orphans = list(result.scalars())
+        if orphans:
+            await db.execute(delete(CitationHistoryDB).where(CitationHistoryDB.article_id.in_(orphans)))
+            await db.execute(delete(ArticleDB).where(ArticleDB.id.in_(orphans)))
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque keyset cursor: the sort key values of the last row on the page"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, key_type: Union[type, Tuple[type, ...]]) -> List[Any]:
+    """Inverse of encode_cursor for a (sort key, id) pair; raises ValueError on malformed input"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor")
+    # JSON true/false decode to bool, which isinstance also counts as int
+    key, row_id = values
+    if isinstance(key, bool) or isinstance(row_id, bool):
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, key_type) or not isinstance(row_id, int):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+async def search_history_page(db: AsyncSession, limit: int, cursor: Optional[str] = None,
+                              with_counts: bool = False) -> Tuple[List[SearchSummary], Optional[str]]:
+    """Newest-first SearchDB summaries using keyset pagination on (created_at, id)"""
+    columns = [
+        SearchDB.id, SearchDB.keyword, SearchDB.start_year, SearchDB.end_year,
+        SearchDB.total_results, SearchDB.created_at
+    ]
+    if with_counts:
+        columns.append(
+            select(func.count(SearchArticleDB.article_id))
+            .where(SearchArticleDB.search_id == SearchDB.id)
+            .scalar_subquery()
+            .label("article_count")
+        )
+    query = select(*columns).order_by(SearchDB.created_at.desc(), SearchDB.id.desc()).limit(limit + 1)
+    if cursor:
+        created_at, search_id = decode_cursor(cursor, str)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError as e:
+            raise ValueError("Invalid cursor") from e
+        query = query.where(or_(
+            SearchDB.created_at < created_at,
+            and_(SearchDB.created_at == created_at, SearchDB.id < search_id)
+        ))
+
+    rows = (await db.execute(query)).all()
+    items = [SearchSummary(**row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return items, next_cursor
+
+
+# Article orderings for paginated retrieval: (sort key expression, descending, sort key type in cursors)
+ARTICLE_SORTS = {
+    "rank": (SearchArticleDB.rank, False, int),
+    "citations": (func.coalesce(ArticleDB.citations, 0), True, int),
+    "citations_per_year": (func.coalesce(ArticleDB.citations_per_year, 0.0), True, (int, float)),
+    "year": (func.coalesce(ArticleDB.year, 0), True, int),
+}
+
+
+async def article_page(db: AsyncSession, search_id: int, limit: int, cursor: Optional[str] = None,
+                       sort_by: str = "rank") -> Tuple[List[ArticleSchema], Optional[str]]:
+    """One page of a search's articles ordered by `sort_by`, ties broken by id"""
+    key, descending, key_type = ARTICLE_SORTS[sort_by]
+    query = (
+        select(ArticleDB, key.label("sort_key"))
+        .join(SearchArticleDB, SearchArticleDB.article_id == ArticleDB.id)
+        .where(SearchArticleDB.search_id == search_id)
+        .order_by(key.desc() if descending else key.asc(), ArticleDB.id.asc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        value, article_id = decode_cursor(cursor, key_type)
+        beyond = key < value if descending else key > value
+        query = query.where(or_(beyond, and_(key == value, ArticleDB.id > article_id)))
+
+    rows = (await db.execute(query)).all()
+    articles = [ArticleSchema.model_validate(row[0]) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.sort_key, last[0].id)
+    return articles, next_cursor
+
+
+def begin_checkpoint(search_record: SearchDB, request: SearchRequest):
+    """Mark a new search as crawling from the first page; the caller commits"""
+    search_record.status = "running"
+    search_record.checkpoint = {
+        "next_start": 0, "pages_done": 0, "num_results": request.num_results, "use_cache": request.use_cache
+    }
+    search_record.checkpoint_at = datetime.utcnow()
+
+
+def save_checkpoint(search_record: SearchDB, start: int, articles_parsed: int, total_results: int):
+    """Record that the page at `start` is stored; commit together with that page's articles.
+
+    `articles_parsed` numbers the ranks of the next page; `total_results` counts the
+    articles linked to the search, fewer when Scholar listed a paper twice.
+    """
+    checkpoint = dict(search_record.checkpoint or {})
+    if articles_parsed == checkpoint.get("articles_parsed", 0):
+        # iter_search yields an empty page only when it could not be fetched
+        checkpoint["pages_failed"] = checkpoint.get("pages_failed", 0) + 1
+    checkpoint["next_start"] = start + settings.results_per_page
+    checkpoint["pages_done"] = checkpoint.get("pages_done", 0) + 1
+    checkpoint["articles_parsed"] = articles_parsed
+    # A new dict, since in-place changes to a JSON column go unnoticed
+    search_record.checkpoint = checkpoint
+    search_record.total_results = total_results
+    search_record.checkpoint_at = datetime.utcnow()
+
+
+@asynccontextmanager
+async def checkpoint_heartbeat(search_id: int):
+    """Keep a crawling search's checkpoint_at fresh while its next page is still in flight.
+
+    Low rate limits, retry backoff or a CAPTCHA wait can hold up a page for longer than
+    settings.crawl_checkpoint_stale_after; without a heartbeat the resume scan would
+    take the live search for an interrupted one and crawl it a second time.
+    """
+    async def beat():
+        while True:
+            await asyncio.sleep(settings.crawl_checkpoint_stale_after / 4)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(SearchDB).where(SearchDB.id == search_id, SearchDB.status == "running")
+                        .values(checkpoint_at=datetime.utcnow())
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.warning("Checkpoint heartbeat for search %d failed: %s", search_id, e)
+
+    task = asyncio.create_task(beat())
+    try:
+        yield
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def finish_checkpoint(search_record: SearchDB):
+    """Mark a search's crawl as done; `exhausted` when every page came back and Scholar still ran out"""
+    checkpoint = dict(search_record.checkpoint or {})
+    checkpoint["exhausted"] = (
+        "articles_parsed" in checkpoint and not checkpoint.get("pages_failed")
+        and checkpoint["articles_parsed"] < checkpoint.get("num_results", 0)
+    )
+    search_record.checkpoint = checkpoint
+    search_record.status = "completed"
+    search_record.checkpoint_at = datetime.utcnow()
+
+
+async def mark_search_failed(db: AsyncSession, search_id: int):
+    """Stop a search from being resumed after its crawl raised; works after a rollback"""
+    await db.execute(
+        update(SearchDB).where(SearchDB.id == search_id)
+        .values(status="failed", checkpoint_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def find_recent_search(db: AsyncSession, request: SearchRequest) -> Optional[SearchDB]:
+    """Latest finished search for the same query that is fresh and complete enough to answer it"""
+    if not request.use_cache or settings.search_memo_ttl <= 0:
+        return None
+
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.search_memo_ttl)
+    result = await db.execute(
+        select(SearchDB)
+        .where(
+            SearchDB.keyword == request.keyword,
+            SearchDB.start_year.is_(None) if request.start_year is None else SearchDB.start_year == request.start_year,
+            SearchDB.end_year.is_(None) if request.end_year is None else SearchDB.end_year == request.end_year,
+            # Enough stored, or a crawl that covered as many of Scholar's results (some may have
+            # been duplicates) or all of them
+            or_(
+                SearchDB.total_results >= request.num_results,
+                SearchDB.checkpoint["articles_parsed"].as_integer() >= request.num_results,
+                SearchDB.checkpoint["exhausted"].as_boolean()
+            ),
+            SearchDB.created_at >= cutoff,
+            # Not one still crawling or stopped part-way; NULL is a search stored before checkpoints
+            or_(SearchDB.status.is_(None), SearchDB.status == "completed"),
+            # Sharded crawls have no single relevance order to take the top of
+            or_(SearchDB.mode.is_(None), SearchDB.mode == "standard")
+        )
+        .order_by(SearchDB.created_at.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
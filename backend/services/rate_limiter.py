@@ -0,0 +1,162 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from core.config import settings
+
+
+class TokenBucket:
+    """In-process token bucket shared by every spider in this process.
+
+    Tokens are reserved rather than polled: a caller that finds the bucket empty
+    takes a token on credit and sleeps until it would have been refilled, so
+    waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def adjust_rate(self, adjust: Callable[[float], float]) -> Tuple[float, float]:
+        """Replace the refill rate with adjust(current rate), atomically; returns (old, new).
+
+        Tokens earned so far are credited at the old rate.
+        """
+        with self._lock:
+            old = self.rate
+            new = adjust(old)
+            if new != old:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * old)
+                self._updated_at = now
+                self.rate = new
+            return old, new
+
+    def set_rate(self, rate: float):
+        """Change the refill rate, crediting tokens earned so far at the old rate"""
+        self.adjust_rate(lambda _: rate)
+
+    async def adapt_rate(self, adjust: Callable[[float], float]) -> Tuple[float, float]:
+        """adjust_rate for callers on the event loop"""
+        return self.adjust_rate(adjust)
+
+    async def acquire(self) -> float:
+        """Wait for a request slot; returns the number of seconds waited"""
+        if self.rate <= 0:
+            return 0.0
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """Token bucket whose state lives in a SQLite file, shared by all worker processes.
+
+    The refill rate is shared too, so a block seen by one process slows all of them.
+    The stored rate outlives the processes and recovers as they succeed again; it
+    never exceeds the rate this bucket was configured with.
+    """
+
+    def __init__(self, rate: float, burst: int, path: str, name: str):
+        super().__init__(rate, burst)
+        self.name = name
+        self.max_rate = rate
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=settings.timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits "
+            "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, rate REAL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(rate_limits)")}
+        if "rate" not in columns:
+            # Files created before the rate was shared
+            self._conn.execute("ALTER TABLE rate_limits ADD COLUMN rate REAL")
+
+    def _update(self, adjust: Callable[[float], float]) -> Tuple[float, float, float]:
+        """Refill the shared row, apply `adjust` to its rate and take adjust's token cost.
+
+        Runs in one IMMEDIATE transaction; returns (old rate, new rate, tokens left).
+        """
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = cur.execute(
+                    "SELECT tokens, updated_at, rate FROM rate_limits WHERE name = ?", (self.name,)
+                ).fetchone()
+                old = self.max_rate if row is None or row[2] is None else min(row[2], self.max_rate)
+                tokens = float(self.burst) if row is None else min(self.burst, row[0] + (now - row[1]) * old)
+                new, cost = adjust(old)
+                new = min(new, self.max_rate)
+                tokens -= cost
+                cur.execute(
+                    "INSERT OR REPLACE INTO rate_limits (name, tokens, updated_at, rate) VALUES (?, ?, ?, ?)",
+                    (self.name, tokens, now, new),
+                )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+            # Mirror the shared rate, so callers reading .rate see other processes' changes
+            self.rate = new
+            return old, new, tokens
+
+    def adjust_rate(self, adjust: Callable[[float], float]) -> Tuple[float, float]:
+        old, new, _ = self._update(lambda rate: (adjust(rate), 0))
+        return old, new
+
+    async def adapt_rate(self, adjust: Callable[[float], float]) -> Tuple[float, float]:
+        # The shared row may be locked by another process, so keep the wait off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.adjust_rate, adjust)
+
+    def _reserve(self) -> float:
+        _, rate, tokens = self._update(lambda rate: (rate, 1))
+        return max(0.0, -tokens / rate)
+
+    async def acquire(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        loop = asyncio.get_running_loop()
+        wait = await loop.run_in_executor(None, self._reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str = "scholar") -> TokenBucket:
+    """Return the process-wide limiter for `name`, creating it from settings on first use"""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            if settings.rate_limit_backend == "sqlite":
+                limiter = SQLiteTokenBucket(
+                    settings.rate_limit_qps, settings.rate_limit_burst, settings.rate_limit_db_path, name
+                )
+            else:
+                limiter = TokenBucket(settings.rate_limit_qps, settings.rate_limit_burst)
+            _limiters[name] = limiter
+        return limiter
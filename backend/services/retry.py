@@ -0,0 +1,73 @@
+import logging
+import random
+import threading
+from collections import deque
+from typing import Dict
+
+from core.config import settings
+from services.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean "slow down and try again" rather than "this page is bad"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# The retryable responses that mean Scholar is rate limiting us; other 5xx are transient upstream errors
+BLOCK_STATUS = {429, 503}
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with equal jitter for the given 0-based retry attempt"""
+    delay = min(settings.retry_backoff_max, settings.retry_backoff_base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class AdaptiveThrottle:
+    """Steers a rate limiter toward the fastest rate Scholar tolerates (AIMD).
+
+    Every block (429/503 or robot page) cuts the rate multiplicatively; successes
+    raise it additively, but only while blocks are rare in the recent window, and
+    never above the configured QPS.
+    """
+
+    def __init__(self, limiter: TokenBucket, max_rate: float):
+        self.limiter = limiter
+        self.max_rate = max_rate
+        self.recent = deque(maxlen=settings.throttle_window)
+        self._lock = threading.Lock()
+
+    @property
+    def block_rate(self) -> float:
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+
+    async def record(self, blocked: bool):
+        if self.max_rate <= 0:
+            return
+        with self._lock:
+            self.recent.append(blocked)
+            block_rate = self.block_rate
+
+        def adjust(rate: float) -> float:
+            if blocked:
+                return max(settings.rate_limit_min_qps, rate * settings.throttle_decrease_factor)
+            if block_rate < settings.throttle_block_rate_threshold:
+                return min(self.max_rate, rate + settings.throttle_increase_step)
+            return rate
+
+        # Applied to the limiter's current rate, which other processes may have changed
+        old, rate = await self.limiter.adapt_rate(adjust)
+        if blocked and rate != old:
+            logger.warning("Blocked by Scholar, lowering request rate to %.2f/s (recent block rate %.0f%%)",
+                           rate, block_rate * 100)
+
+
+_throttles: Dict[int, AdaptiveThrottle] = {}
+_throttles_lock = threading.Lock()
+
+
+def get_throttle(limiter: TokenBucket) -> AdaptiveThrottle:
+    """Return the process-wide throttle steering `limiter`"""
+    with _throttles_lock:
+        throttle = _throttles.get(id(limiter))
+        if throttle is None:
+            throttle = _throttles[id(limiter)] = AdaptiveThrottle(limiter, settings.rate_limit_qps)
+        return throttle
@@ -0,0 +1,172 @@
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.metrics import SEARCHES_IN_FLIGHT
+from models.article import SearchDB, SearchJobStatus, SearchRequest
+from services.original_spider import OriginalScholarSpider
+from services.persistence import (
+    bulk_insert_articles, checkpoint_heartbeat, count_search_articles, finish_checkpoint, mark_search_failed,
+    save_checkpoint
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SearchJob:
+    """Progress of a background crawl, kept in memory by the process running it"""
+    search_id: int
+    request: SearchRequest
+    status: str = "queued"
+    pages_done: int = 0
+    articles_parsed: int = 0
+    error: Optional[str] = None
+    insert_ms: float = 0.0
+    page_outcomes: List[dict] = field(default_factory=list)
+    shards: Optional[List[dict]] = None
+    pages_planned: Optional[int] = None  # Set when the page count is only known while crawling
+    start_offset: int = 0  # start= to continue from when resuming a checkpointed crawl
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def pages_total(self) -> int:
+        if self.pages_planned is not None:
+            return self.pages_planned
+        return math.ceil(self.request.num_results / settings.results_per_page)
+
+    def to_status(self) -> SearchJobStatus:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        eta = None
+        if self.status == "running" and self.pages_done:
+            eta = round(elapsed / self.pages_done * max(0, self.pages_total - self.pages_done), 1)
+        elif self.status == "completed":
+            eta = 0.0
+        return SearchJobStatus(
+            search_id=self.search_id,
+            keyword=self.request.keyword,
+            status=self.status,
+            pages_total=self.pages_total,
+            pages_done=self.pages_done,
+            articles_parsed=self.articles_parsed,
+            elapsed_seconds=round(elapsed, 1),
+            eta_seconds=eta,
+            insert_ms=round(self.insert_ms, 2),
+            page_outcomes=self.page_outcomes,
+            shards=self.shards,
+            error=self.error
+        )
+
+
+_jobs: Dict[int, SearchJob] = {}
+
+
+def _prune_jobs():
+    """Forget finished jobs once they are older than an hour"""
+    cutoff = time.time() - 3600
+    for search_id in [sid for sid, job in _jobs.items() if job.finished_at and job.finished_at < cutoff]:
+        del _jobs[search_id]
+
+
+def register_job(job: SearchJob) -> SearchJob:
+    """Track `job` so /api/search/jobs/{search_id} reports its live progress"""
+    _prune_jobs()
+    _jobs[job.search_id] = job
+    return job
+
+
+def create_job(search_id: int, request: SearchRequest) -> SearchJob:
+    return register_job(SearchJob(search_id=search_id, request=request))
+
+
+def resume_from_checkpoint(job: SearchJob, search: SearchDB):
+    """Continue `job` after the pages its search already stored (a no-op for a fresh search)"""
+    checkpoint = search.checkpoint or {}
+    job.start_offset = checkpoint.get("next_start", 0)
+    job.pages_done = checkpoint.get("pages_done", 0)
+    job.articles_parsed = checkpoint.get("articles_parsed", search.total_results or 0)
+
+
+def get_job(search_id: int) -> Optional[SearchJob]:
+    return _jobs.get(search_id)
+
+
+def active_search_ids() -> List[int]:
+    """Searches this process is crawling or about to crawl"""
+    return [search_id for search_id, job in _jobs.items() if job.status in ("queued", "running")]
+
+
+async def _crawl_pages(job: SearchJob, db, search_record: SearchDB, spider: OriginalScholarSpider, scheduler=None):
+    async with checkpoint_heartbeat(job.search_id):
+        await _store_pages(job, db, search_record, spider, scheduler)
+    finish_checkpoint(search_record)
+    await db.commit()
+
+
+async def _store_pages(job: SearchJob, db, search_record: SearchDB, spider: OriginalScholarSpider, scheduler=None):
+    request = job.request
+    pages = spider.iter_search(
+        keyword=request.keyword,
+        num_results=request.num_results,
+        start_year=request.start_year,
+        end_year=request.end_year,
+        use_cache=request.use_cache,
+        scheduler=scheduler,
+        start_offset=job.start_offset
+    )
+    try:
+        async for start, page_articles in pages:
+            first_rank = job.articles_parsed + 1
+            job.insert_ms += await bulk_insert_articles(
+                db, job.search_id, enumerate(page_articles, start=first_rank)
+            )
+            job.articles_parsed += len(page_articles)
+            save_checkpoint(
+                search_record, start, job.articles_parsed, await count_search_articles(db, job.search_id)
+            )
+            job.page_outcomes = spider.page_outcome_list(request.keyword, request.start_year, request.end_year)
+            await db.commit()
+            job.pages_done += 1
+        job.page_outcomes = search_record.page_outcomes = spider.page_outcome_list(
+            request.keyword, request.start_year, request.end_year
+        )
+    finally:
+        await pages.aclose()
+        spider.forget_page_outcomes(request.keyword, request.start_year, request.end_year)
+
+
+async def run_search_job(job: SearchJob, scheduler=None):
+    """Crawl in the background, committing each page's articles as soon as it is parsed.
+
+    Batch searches pass the batch's CrawlScheduler and share its spider instead of opening their own.
+    """
+    job.status = "running"
+    job.started_at = time.time()
+    mode = "batch" if scheduler else "job"
+
+    async with AsyncSessionLocal() as db:
+        search_record = await db.get(SearchDB, job.search_id)
+        SEARCHES_IN_FLIGHT.inc(mode=mode)
+        try:
+            if scheduler:
+                await _crawl_pages(job, db, search_record, scheduler.spider, scheduler)
+            else:
+                async with OriginalScholarSpider() as spider:
+                    await _crawl_pages(job, db, search_record, spider)
+            job.status = "completed"
+        except Exception as e:
+            await db.rollback()
+            logger.exception("Search job %d failed: %s", job.search_id, e)
+            job.status = "failed"
+            job.error = str(e)
+            await mark_search_failed(db, job.search_id)
+        finally:
+            SEARCHES_IN_FLIGHT.dec(mode=mode)
+            job.finished_at = time.time()
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.metrics import SEARCHES_IN_FLIGHT
+from models.article import ArticleSchema, SearchDB, SearchRequest
+from services.fingerprint import article_fingerprint
+from services.job_queue import enqueue_job, get_job_status
+from services.original_spider import OriginalScholarSpider
+from services.persistence import (
+    begin_checkpoint, bulk_insert_articles, checkpoint_heartbeat, count_search_articles, finish_checkpoint,
+    mark_search_failed, ranked_articles, save_checkpoint
+)
+
+logger = logging.getLogger(__name__)
+
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def format_event(event: str, data: dict, fmt: str) -> bytes:
+    payload = json.dumps(data, default=str)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+    return (json.dumps({"event": event, "data": data}, default=str) + "\n").encode("utf-8")
+
+
+async def _tail_queued_search(db: AsyncSession, request: SearchRequest, search_id: int, fmt: str):
+    """Queue mode: emit the articles a crawl worker commits for the search, page by page"""
+    sent = 0
+    emitted = 0
+    while True:
+        # Read the status first: articles committed before it finished are then all visible below
+        status = await get_job_status(db, search_id)
+        if status is None:
+            yield format_event("error", {"search_id": search_id, "detail": "Search was deleted"}, fmt)
+            return
+        result = await db.execute(ranked_articles(search_id, after_rank=sent))
+        for article, sent in result.all():
+            emitted += 1
+            yield format_event("article", {"rank": sent, **ArticleSchema.model_validate(article).model_dump()}, fmt)
+        await db.commit()
+        if status.status == "failed":
+            yield format_event("error", {"search_id": search_id, "detail": status.error}, fmt)
+            return
+        if status.status == "completed":
+            break
+        await asyncio.sleep(settings.crawl_worker_poll_interval)
+
+    yield format_event("summary", {
+        "search_id": search_id,
+        "keyword": request.keyword,
+        "total_results": emitted,
+        "sort_by": request.sort_by,
+        "insert_ms": status.insert_ms,
+        "page_outcomes": [outcome.model_dump() for outcome in status.page_outcomes],
+        "message": "Search completed successfully"
+    }, fmt)
+
+
+async def stream_search(request: SearchRequest, fmt: str, cached_search_id: Optional[int] = None):
+    """Yield one `article` event per result as soon as its page is parsed, then a `summary` event.
+
+    Articles are written to the database page by page and never accumulated, so memory
+    use does not grow with num_results. Events arrive in Scholar's relevance order; the
+    summary carries sort_by so clients can apply the final ordering.
+    """
+    async with AsyncSessionLocal() as db:
+        if cached_search_id is not None:
+            result = await db.stream(ranked_articles(cached_search_id).limit(request.num_results))
+            total = 0
+            async for article in result.scalars():
+                total += 1
+                yield format_event("article", {"rank": total, **ArticleSchema.model_validate(article).model_dump()}, fmt)
+            yield format_event("summary", {
+                "search_id": cached_search_id,
+                "keyword": request.keyword,
+                "total_results": total,
+                "sort_by": request.sort_by,
+                "message": "Search served from recent results"
+            }, fmt)
+            return
+
+        search_record = SearchDB(
+            keyword=request.keyword,
+            start_year=request.start_year,
+            end_year=request.end_year
+        )
+        begin_checkpoint(search_record, request)
+        db.add(search_record)
+        await db.commit()
+        await db.refresh(search_record)
+        yield format_event("search", {"search_id": search_record.id, "keyword": request.keyword}, fmt)
+
+        if settings.crawl_queue_enabled:
+            enqueue_job(db, search_record.id, request)
+            await db.commit()
+            async for event in _tail_queued_search(db, request, search_record.id, fmt):
+                yield event
+            return
+
+        total = 0
+        parsed = 0
+        seen = set()
+        insert_ms = 0.0
+        SEARCHES_IN_FLIGHT.inc(mode="stream")
+        try:
+            async with OriginalScholarSpider() as spider, checkpoint_heartbeat(search_record.id):
+                pages = spider.iter_search(
+                    keyword=request.keyword,
+                    num_results=request.num_results,
+                    start_year=request.start_year,
+                    end_year=request.end_year,
+                    use_cache=request.use_cache
+                )
+                try:
+                    async for start, page_articles in pages:
+                        # Persist the page before emitting it, so a client disconnect loses nothing
+                        insert_ms += await bulk_insert_articles(
+                            db, search_record.id, enumerate(page_articles, start=parsed + 1)
+                        )
+                        parsed += len(page_articles)
+                        save_checkpoint(search_record, start, parsed, await count_search_articles(db, search_record.id))
+                        await db.commit()
+                        for article in page_articles:
+                            # Scholar can list a paper twice; the search links it once
+                            fingerprint = article_fingerprint(article)
+                            if fingerprint in seen:
+                                continue
+                            seen.add(fingerprint)
+                            total += 1
+                            yield format_event("article", {"rank": total, **article.model_dump()}, fmt)
+                finally:
+                    await pages.aclose()
+            search_record.page_outcomes = spider.page_outcome_list()
+            finish_checkpoint(search_record)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            await mark_search_failed(db, search_record.id)
+            logger.exception("Streaming search %d failed: %s", search_record.id, e)
+            yield format_event("error", {"search_id": search_record.id, "detail": str(e)}, fmt)
+            return
+        finally:
+            SEARCHES_IN_FLIGHT.dec(mode="stream")
+
+        yield format_event("summary", {
+            "search_id": search_record.id,
+            "keyword": request.keyword,
+            "total_results": total,
+            "sort_by": request.sort_by,
+            "rate_limit_wait": round(spider.rate_limit_wait, 3),
+            "insert_ms": round(insert_ms, 2),
+            "page_outcomes": search_record.page_outcomes,
+            "message": "Search completed successfully"
+        }, fmt)
@@ -0,0 +1,167 @@
+"""Year-range sharded search.
+
+Scholar stops paginating a query after about settings.scholar_result_ceiling hits.
+A sharded search splits the keyword into year windows (as_ylo/as_yhi), probes each
+window's first page for Scholar's hit estimate, and bisects any window that is
+still over the ceiling. Windows that fit are crawled concurrently through one
+spider, so they share its concurrency limit and egress rate budget. Articles are
+deduplicated by fingerprint and stored into a single SearchDB as they arrive.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import List, Set
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.metrics import SEARCHES_IN_FLIGHT
+from models.article import ArticleSchema, SearchDB
+from services.fingerprint import article_fingerprint
+from services.original_spider import OriginalScholarSpider
+from services.persistence import (
+    begin_checkpoint, bulk_insert_articles, checkpoint_heartbeat, delete_search_articles, finish_checkpoint,
+    mark_search_failed
+)
+from services.search_jobs import SearchJob
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedCrawl:
+    """Adaptive year-window crawl feeding deduplicated articles to a SearchJob"""
+
+    def __init__(self, spider: OriginalScholarSpider, job: SearchJob, db):
+        self.spider = spider
+        self.job = job
+        self.db = db
+        self.request = job.request
+        self.seen: Set[str] = set()
+        self.shards: List[dict] = []
+        self._lock = asyncio.Lock()
+        job.shards = self.shards
+        job.pages_planned = 0
+
+    @property
+    def done(self) -> bool:
+        return self.job.articles_parsed >= self.request.num_results
+
+    async def _store(self, shard: dict, articles: List[ArticleSchema]):
+        """Insert the not-yet-seen articles of one page and commit them"""
+        async with self._lock:
+            self.job.pages_done += 1
+            fresh = []
+            for article in articles:
+                fingerprint = article_fingerprint(article)
+                if fingerprint not in self.seen and self.job.articles_parsed + len(fresh) < self.request.num_results:
+                    self.seen.add(fingerprint)
+                    fresh.append(article)
+            if not fresh:
+                return
+            first_rank = self.job.articles_parsed + 1
+            self.job.insert_ms += await bulk_insert_articles(
+                self.db, self.job.search_id, enumerate(fresh, start=first_rank)
+            )
+            self.job.articles_parsed += len(fresh)
+            shard["articles_new"] += len(fresh)
+            search_record = await self.db.get(SearchDB, self.job.search_id)
+            search_record.total_results = self.job.articles_parsed
+            await self.db.commit()
+
+    async def crawl_window(self, start_year: int, end_year: int):
+        if self.done:
+            return
+        ceiling = settings.scholar_result_ceiling
+        per_page = settings.results_per_page
+        count, first_page = await self.spider.probe(
+            self.request.keyword, start_year, end_year, self.request.use_cache
+        )
+        shard = {"start_year": start_year, "end_year": end_year, "estimated_results": count,
+                 "saturated": False, "failed": first_page is None, "articles_new": 0}
+        self.job.pages_planned += 1
+        if shard["failed"]:
+            # Retries are used up; report the window instead of silently leaving it out
+            logger.warning("Skipping %d-%d: its first page could not be fetched", start_year, end_year)
+            self.shards.append(shard)
+            return
+
+        if count is not None and count > ceiling and start_year < end_year:
+            # Too big to paginate: keep this page's articles and split the window in two
+            logger.info("Splitting %d-%d (about %d results)", start_year, end_year, count)
+            await self._store(shard, first_page)
+            middle = (start_year + end_year) // 2
+            await asyncio.gather(
+                self.crawl_window(start_year, middle),
+                self.crawl_window(middle + 1, end_year),
+            )
+            return
+
+        shard["saturated"] = count is not None and count > ceiling
+        self.shards.append(shard)
+        await self._store(shard, first_page)
+        if not first_page:
+            return
+
+        # Page up to the estimate (often too high) or the ceiling, stopping at the first empty page
+        reachable = min(count if count is not None else ceiling, ceiling)
+        starts = range(per_page, reachable, per_page)
+        self.job.pages_planned += len(starts)
+        logger.info("Crawling %d-%d: about %s results, %d more pages",
+                    start_year, end_year, count if count is not None else "?", len(starts))
+        pages = self.spider.iter_pages(
+            self.request.keyword, starts, start_year, end_year, self.request.use_cache
+        )
+        fetched = 0
+        try:
+            async for _, articles in pages:
+                fetched += 1
+                # A page that could not be fetched is skipped; later ones may still have results
+                await self._store(shard, articles or [])
+                if self.done or articles == []:
+                    break
+        finally:
+            await pages.aclose()
+        # The estimate promised more pages than the window had
+        self.job.pages_planned -= len(starts) - fetched
+
+
+async def run_sharded_job(job: SearchJob):
+    """Crawl a ShardedSearchRequest in the background into job.search_id.
+
+    Sharded crawls keep no page checkpoint, so a retried or resumed one starts over
+    on a clean slate; the search's status is kept like a standard search's.
+    """
+    request = job.request
+    job.status = "running"
+    job.started_at = time.time()
+    start_year = request.start_year or settings.shard_start_year
+    end_year = request.end_year or datetime.now().year
+
+    async with AsyncSessionLocal() as db:
+        SEARCHES_IN_FLIGHT.inc(mode="sharded")
+        try:
+            search_record = await db.get(SearchDB, job.search_id)
+            await delete_search_articles(db, job.search_id)
+            search_record.total_results = 0
+            begin_checkpoint(search_record, request)
+            await db.commit()
+            async with OriginalScholarSpider() as spider, checkpoint_heartbeat(job.search_id):
+                crawl = ShardedCrawl(spider, job, db)
+                await crawl.crawl_window(start_year, end_year)
+            search_record = await db.get(SearchDB, job.search_id)
+            job.page_outcomes = search_record.page_outcomes = spider.page_outcome_list()
+            finish_checkpoint(search_record)
+            await db.commit()
+            job.shards.sort(key=lambda shard: shard["start_year"])
+            job.status = "completed"
+            logger.info("Sharded search %d finished: %d articles from %d windows in %.1fs",
+                        job.search_id, job.articles_parsed, len(job.shards), time.time() - job.started_at)
+        except Exception as e:
+            await db.rollback()
+            logger.exception("Sharded search %d failed: %s", job.search_id, e)
+            job.status = "failed"
+            job.error = str(e)
+            await mark_search_failed(db, job.search_id)
+        finally:
+            SEARCHES_IN_FLIGHT.dec(mode="sharded")
+            job.finished_at = time.time()
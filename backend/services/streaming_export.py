@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+import time
+from typing import AsyncIterator, Dict, List, Set
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.metrics import EXPORT_SECONDS
+from models.article import ArticleDB, ArticleSchema
+from services.persistence import linked_articles
+
+# Same columns, in the same order, as ArticleSchema.dict() in the in-memory exporters
+EXPORT_FIELDS = list(ArticleSchema.model_fields)
+
+STREAMING_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "json": ("application/json", "json"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "bibtex": ("text/plain", "bib"),
+}
+
+
+async def iter_article_chunks(search_ids: List[int]) -> AsyncIterator[List[Dict]]:
+    """Read articles of the given searches through a server-side cursor, one chunk at a time.
+
+    Rows are fetched as plain column mappings rather than ORM objects, so nothing
+    accumulates in a session identity map and memory stays bounded by the chunk size
+    (plus, when merging searches, the ids already exported: an article found by
+    several of them is written once).
+    """
+    chunk_size = settings.export_chunk_size
+    columns = [ArticleDB.__table__.c[name] for name in EXPORT_FIELDS]
+    seen: Set[int] = set()
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            linked_articles(search_ids, *columns).execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.mappings().partitions(chunk_size):
+            rows = []
+            for row in partition:
+                if len(search_ids) > 1:
+                    if row["id"] in seen:
+                        continue
+                    seen.add(row["id"])
+                rows.append(dict(row))
+            if rows:
+                yield rows
+
+
+async def stream_csv(search_ids: List[int]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_FIELDS)
+    async for rows in iter_article_chunks(search_ids):
+        for row in rows:
+            writer.writerow(["" if row[name] is None else row[name] for name in EXPORT_FIELDS])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def stream_ndjson(search_ids: List[int]) -> AsyncIterator[bytes]:
+    async for rows in iter_article_chunks(search_ids):
+        yield "".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8")
+
+
+async def stream_json(search_ids: List[int]) -> AsyncIterator[bytes]:
+    """A JSON array laid out exactly like json.dumps(articles, indent=2)"""
+    first = True
+    async for rows in iter_article_chunks(search_ids):
+        parts = []
+        for row in rows:
+            entry = "\n".join("  " + line for line in json.dumps(row, indent=2, default=str).splitlines())
+            parts.append(("[\n" if first else ",\n") + entry)
+            first = False
+        yield "".join(parts).encode("utf-8")
+    yield b"[]" if first else b"\n]"
+
+
+async def stream_bibtex(search_ids: List[int]) -> AsyncIterator[bytes]:
+    """BibTeX entries written chunk by chunk, in article order"""
+    from bibtexparser.bibdatabase import BibDatabase
+    from bibtexparser.bwriter import BibTexWriter
+
+    writer = BibTexWriter()
+    writer.order_entries_by = None
+    index = 0
+    async for rows in iter_article_chunks(search_ids):
+        # The writer joins entries with entry_separator, so chunk boundaries need one too
+        separator = writer.entry_separator if index else ""
+        db = BibDatabase()
+        for row in rows:
+            index += 1
+            entry = {
+                'ENTRYTYPE': 'article',
+                'ID': f'article{index}',
+                'title': row['title'],
+                'author': row['authors'] or 'Unknown',
+                'year': str(row['year']) if row['year'] else '',
+                'journal': row['venue'] or '',
+                'publisher': row['publisher'] or '',
+                'url': row['url'] or '',
+                'abstract': row['description'] or ''
+            }
+            db.entries.append({k: v for k, v in entry.items() if v})
+        yield (separator + writer.write(db)).encode("utf-8")
+
+
+STREAMERS = {
+    "csv": stream_csv,
+    "json": stream_json,
+    "ndjson": stream_ndjson,
+    "bibtex": stream_bibtex,
+}
+
+
+async def stream_export(search_ids: List[int], fmt: str) -> AsyncIterator[bytes]:
+    """Stream the export in `fmt`, timing it from first to last chunk"""
+    started = time.perf_counter()
+    async for chunk in STREAMERS[fmt](search_ids):
+        yield chunk
+    EXPORT_SECONDS.observe(time.perf_counter() - started, format=fmt)
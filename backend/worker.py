@@ -0,0 +1,62 @@
+"""Crawl worker entry point.
+
+Claims crawls from the durable queue in the shared database and runs them. Start the
+API with CRAWL_QUEUE_ENABLED=true so it only enqueues, then run as many workers as
+the rate budget allows, on this or other machines sharing the database:
+
+    cd backend && python worker.py [--concurrency 4] [--worker-id crawler-1] [--refresh]
+
+SIGINT/SIGTERM stop claiming and hand running jobs back to the queue, where another
+worker continues them from their last page checkpoint.
+"""
+import argparse
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from core.config import settings
+from core.database import engine, init_db
+from core.logging_config import configure_logging
+from services.browser_pool import shutdown_browser_pool
+from services.citation_refresh import start_refresh_scheduler
+from services.crawl_worker import CrawlWorker
+from services.parse_executor import shutdown_parse_executor
+
+
+async def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--concurrency", type=int, default=settings.crawl_worker_concurrency,
+                            help="jobs crawled at once by this process")
+    arg_parser.add_argument("--worker-id", help="lease owner name (default: host:pid)")
+    arg_parser.add_argument("--refresh", action="store_true",
+                            help="also run the scheduled citation refresh (CITATION_REFRESH_INTERVAL); use on one worker")
+    args = arg_parser.parse_args()
+
+    configure_logging()
+    await init_db()
+    worker = CrawlWorker(args.worker_id, args.concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            # Windows: Ctrl+C still interrupts, without the graceful hand-back
+            pass
+
+    # With the queue enabled the API leaves scheduled citation refreshes to a worker
+    refresh_task = start_refresh_scheduler() if args.refresh else None
+    try:
+        await worker.run()
+    finally:
+        if refresh_task:
+            refresh_task.cancel()
+        shutdown_parse_executor()
+        shutdown_browser_pool()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())